@@ -1,3 +1,4 @@
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -19,5 +20,100 @@ class Settings(BaseSettings):
     BUBBLE_ENVIRONMENT: str = "production"
     BUBBLE_PROMPTTEMPLATECUSTOM_DATA_TYPE: str = "prompttemplatecustom"
 
+    # Bubble HTTP client (shared connection pool)
+    BUBBLE_HTTP_TIMEOUT: float = 30.0
+    BUBBLE_MAX_CONNECTIONS: int = 100
+    BUBBLE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+
+    # Retries for idempotent Bubble calls (search/get/patch) on 429/5xx and transport errors
+    BUBBLE_RETRY_MAX_ATTEMPTS: int = 3
+    BUBBLE_RETRY_BACKOFF_BASE: float = 0.5
+    BUBBLE_RETRY_BACKOFF_MAX: float = 10.0
+
+    # Outbound rate limits in requests/second per operation class (search/read/write/bulk); keys may be
+    # "environment:class" to override one environment, 0 disables. Callers queue up to the max wait.
+    BUBBLE_RATE_LIMITS: Dict[str, float] = {"search": 20.0, "read": 20.0, "write": 10.0, "bulk": 2.0}
+    # Bucket capacity is rate x burst seconds, unless a class (or "environment:class") has its own burst size.
+    # Bulk gets room for two uploads' BUBBLE_BULK_CONCURRENCY chunks at once; its rate still caps the sustained pace.
+    BUBBLE_RATE_LIMIT_BURST_SECONDS: float = 1.0
+    BUBBLE_RATE_LIMIT_BURSTS: Dict[str, float] = {"bulk": 6.0}
+    BUBBLE_RATE_LIMIT_MAX_WAIT: float = 10.0
+
+    # Per-environment circuit breaker: consecutive failed calls (after retries; 429s don't count) before failing fast (0 disables), seconds until a trial call
+    BUBBLE_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    BUBBLE_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # PromptField name -> ID cache (set max entries to 0 to disable)
+    PROMPTFIELD_CACHE_MAX_ENTRIES: int = 5000
+    PROMPTFIELD_CACHE_TTL_SECONDS: float = 3600.0
+    PROMPTFIELD_CACHE_NEGATIVE_TTL_SECONDS: float = 30.0
+
+    # Max concurrent per-item Bubble lookups, per environment (JSON object in env, e.g. {"production": 8})
+    BUBBLE_LOOKUP_CONCURRENCY: Dict[str, int] = {"production": 8, "version-test": 4}
+    BUBBLE_LOOKUP_CONCURRENCY_DEFAULT: int = 4
+
+    # Chunked bulk uploads: records per /bulk call, chunks uploaded in parallel, per-chunk timeout
+    BUBBLE_BULK_CHUNK_SIZE: int = 500
+    BUBBLE_BULK_CONCURRENCY: int = 3
+    BUBBLE_BULK_TIMEOUT: float = 120.0
+
+    # Background jobs (async mode of process-and-update)
+    JOB_WORKER_COUNT: int = 4
+    JOB_QUEUE_MAX_SIZE: int = 1000
+    JOB_RESULT_TTL_SECONDS: float = 3600.0
+    JOB_RESULT_MAX_ENTRIES: int = 10000
+
+    # Prompt files served by /prompts, kept in memory and re-checked for changes every N seconds (0 disables)
+    PROMPTS_DIR: str = "prompts"
+    PROMPTS_RELOAD_INTERVAL_SECONDS: float = 2.0
+
+    # Rendered prompt + template output, keyed by prompt hash and template record Modified Date (0 disables)
+    PROMPT_RENDER_CACHE_MAX_ENTRIES: int = 1000
+    PROMPT_RENDER_CACHE_TTL_SECONDS: float = 3600.0
+
+    # PromptTemplate / PromptTemplateCustom record cache: fresh for TTL, then served stale for up to
+    # STALE seconds more while a background fetch revalidates it (max entries 0 disables)
+    TEMPLATE_CACHE_MAX_ENTRIES: int = 1000
+    TEMPLATE_CACHE_TTL_SECONDS: float = 300.0
+    TEMPLATE_CACHE_STALE_SECONDS: float = 86400.0
+
+    # Read-through cache for GET /bubble/{data_type}/{record_id}, configured per data type with
+    # ttl_seconds (0 = off), max_entries and optional stale_seconds; unlisted data types are not cached
+    RECORD_CACHE_ENABLED: bool = True
+    RECORD_CACHE_DATA_TYPES: Dict[str, Dict[str, float]] = {
+        "api_request": {"ttl_seconds": 5.0, "max_entries": 2000},
+        "sample": {"ttl_seconds": 30.0, "max_entries": 2000}
+    }
+    RECORD_CACHE_DEFAULT_MAX_ENTRIES: int = 1000
+
+    # Short-lived cache of /bubble/sample-records/search results, dropped when samples are created (0 disables)
+    SAMPLE_SEARCH_CACHE_MAX_ENTRIES: int = 1000
+    SAMPLE_SEARCH_CACHE_TTL_SECONDS: float = 10.0
+
+    # Max record IDs accepted by POST /bubble/{data_type}/batch-get
+    BUBBLE_BATCH_GET_MAX_IDS: int = 1000
+
+    # Merge API Request updates that arrive while a PATCH to the same record is in flight into one follow-up PATCH
+    API_REQUEST_PATCH_COALESCING_ENABLED: bool = True
+
+    # Durable step journal so retried process-and-update calls resume instead of recreating records
+    JOURNAL_ENABLED: bool = True
+    JOURNAL_DB_PATH: str = "data/journal.sqlite3"
+    JOURNAL_RETENTION_SECONDS: float = 7 * 24 * 3600.0
+
+    # Logging: "json" (one object per line) or "text", written by a background thread.
+    # Per-route overrides match the longest request path prefix, e.g. {"/bubble/sample-records": "WARNING"};
+    # sample rates keep that fraction of requests' records below WARNING, e.g. {"/bubble/record-cache": 0.1}
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_ROUTE_LEVELS: Dict[str, str] = {}
+    LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Server-Timing header (phases and Bubble calls) on every response; requests slower than
+    # the threshold are logged with their full call breakdown (0 disables the slow-request log)
+    SERVER_TIMING_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_SECONDS: float = 2.0
+
 # Create a single instance to be imported in other files
 settings = Settings()
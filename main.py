@@ -1,13 +1,13 @@
 from typing import Optional
-import requests
+from contextlib import asynccontextmanager
+import httpx
 import json
 import logging
-from pathlib import Path
 
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Depends, HTTPException, Response, status
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from config import settings
 from dependencies import get_api_key
@@ -22,17 +22,71 @@ from models import (
     PromptResponse,
     PromptListItem,
     PromptListResponse,
-    PromptTemplateProcessedResponse
+    PromptTemplateProcessedResponse,
+    BubbleRecordBatchGet,
+    BulkCreateResponse,
+    PromptFieldBatchResponse,
+    PromptFieldAndGeneratedPromptBatchResponse,
+    BubbleRecordBatchGetResponse
 )
 
+from services.bubble_client import (
+    get_bubble_client,
+    start_bubble_client,
+    close_bubble_client,
+    BubbleAPIError,
+    http_exception_from_bubble_error
+)
+from services.bulk import bulk_create_records
+from services.jobs import Job, JobQueueFull, job_queue
+from services.journal import process_journal, request_fingerprint
+from services.promptfields import (
+    resolve_promptfield_ids,
+    promptfield_cache,
+    promptfield_singleflight
+)
+from services.prompts import prompt_registry, prompt_render_cache, render_prompt_with_template
+from services.rate_limit import rate_limiter_stats
+from services.records import (
+    fetch_records_by_ids,
+    get_record_cache,
+    invalidate_cached_record,
+    record_cache_stats,
+    template_record_cache
+)
+from services.search_cache import sample_search_cache
+from services.resilience import circuit_breaker_stats
+from services.write_coalescer import api_request_patches
+from services.logging_setup import configure_logging, summarize, logging_stats, LogContextMiddleware
+from services.metrics import metrics_registry, Counter, Gauge, MetricsMiddleware
+from services.timing import ServerTimingMiddleware
+
 # Import routers
 from routers.sample_records import router as sample_records_router
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared Bubble connection pool, step journal, prompt registry and job workers on startup, close them on shutdown
+    await start_bubble_client()
+    await process_journal.open()
+    await prompt_registry.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await prompt_registry.stop()
+    await process_journal.close()
+    await close_bubble_client()
+
+app = FastAPI(lifespan=lifespan)
+
+# Per-request phase timing, log level and sampling, and route latency metrics
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(LogContextMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(sample_records_router)
@@ -95,7 +149,7 @@ async def root():
 def read_item(item_id: int, q: Optional[str] = None, api_key: str = Depends(get_api_key)):
     return {"item_id": item_id, "q": q}
 
-@app.post("/bubble/promptfields/batch-process", tags=["bubble"])
+@app.post("/bubble/promptfields/batch-process", tags=["bubble"], response_model=PromptFieldBatchResponse, response_model_exclude_unset=True)
 async def process_promptfield_attributes(
     request_data: PromptFieldBatchRequest,
     api_key: str = Depends(get_api_key)
@@ -113,25 +167,30 @@ async def process_promptfield_attributes(
     
     logger.info(f"Processing {len(request_data.attributes)} PromptField attributes")
     
+    # Resolve all distinct attribute names at once, creating the missing PromptFields
+    promptfield_ids_by_name, lookup_errors = await resolve_promptfield_ids(
+        [attr_value.attribute for attr_value in request_data.attributes],
+        request_data.bubble_environment,
+        create_missing=True
+    )
+    
     for i, attr_value in enumerate(request_data.attributes):
-        try:
-            record_id = await search_or_create_promptfield(attr_value.attribute, request_data.bubble_environment)
-            results.append({
-                "attribute": attr_value.attribute,
-                "value": attr_value.value,
-                "promptfield_id": record_id,
-                "index": i
-            })
-            
-        except Exception as e:
+        if attr_value.attribute in lookup_errors:
             error_detail = {
                 "attribute": attr_value.attribute,
                 "value": attr_value.value,
                 "index": i,
-                "error": str(e)
+                "error": lookup_errors[attr_value.attribute]
             }
             errors.append(error_detail)
-            logger.error(f"Error processing attribute '{attr_value.attribute}': {str(e)}")
+            logger.error(f"Error processing attribute '{attr_value.attribute}': {lookup_errors[attr_value.attribute]}")
+        else:
+            results.append({
+                "attribute": attr_value.attribute,
+                "value": attr_value.value,
+                "promptfield_id": promptfield_ids_by_name[attr_value.attribute],
+                "index": i
+            })
     
     # Extract just the IDs for the main response
     promptfield_ids = [result["promptfield_id"] for result in results]
@@ -151,123 +210,81 @@ async def process_promptfield_attributes(
     
     return response
 
-async def search_or_create_promptfield(attribute_name: str, environment: str = "version-test") -> str:
-    """Search for PromptField by name, create if not found, return record ID"""
-    
-    # Validate Bubble configuration
-    base_url = get_bubble_promptfield_base_url(environment)
-    if not base_url or not settings.BUBBLE_API_TOKEN:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Bubble PromptField API configuration is missing. Please check environment variables."
-        )
-    
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
+@app.get("/bubble/promptfields/cache-stats", tags=["bubble"])
+async def get_promptfield_cache_stats(api_key: str = Depends(get_api_key)):
+    """Report hit/miss/eviction counters of the PromptField name -> ID cache"""
+    return {
+        "success": True,
+        "cache": promptfield_cache.stats(),
+        "singleflight": promptfield_singleflight.stats()
     }
-    
-    # First, search for existing record
-    search_params = {
-        "constraints": json.dumps([{
-            "key": "Name",
-            "constraint_type": "equals",
-            "value": attribute_name
-        }]),
-        "limit": 1
+
+@app.get("/bubble/client-stats", tags=["bubble"])
+async def get_bubble_client_stats(api_key: str = Depends(get_api_key)):
+    """Report outbound rate limiter queue-wait counters, circuit breaker state and PATCH coalescing"""
+    return {
+        "success": True,
+        "rate_limits": rate_limiter_stats(),
+        "circuit_breakers": circuit_breaker_stats(),
+        "api_request_patches": api_request_patches.stats()
     }
-    
-    try:
-        # Search for existing record
-        search_response = requests.get(base_url, headers=headers, params=search_params, timeout=30)
-        
-        if search_response.status_code == 200:
-            search_data = search_response.json()
-            results = search_data.get("response", {}).get("results", [])
-            
-            if results:
-                # Record found, return its ID
-                record_id = results[0].get("_id")
-                logger.info(f"Found existing PromptField record for '{attribute_name}': {record_id}")
-                return record_id
-        
-        # No existing record found, create new one
-        logger.info(f"No existing PromptField found for '{attribute_name}', creating new record")
-        
-        create_payload = {
-            "Name": attribute_name
+
+@app.get("/bubble/record-cache/stats", tags=["bubble"])
+async def get_record_cache_stats(api_key: str = Depends(get_api_key)):
+    """Report hits, misses and approximate memory use of the per-data-type record caches and the sample search cache"""
+    return {
+        "success": True,
+        "caches": record_cache_stats(),
+        "search_caches": {
+            "sample": sample_search_cache.stats()
         }
-        
-        create_response = requests.post(base_url, headers=headers, json=create_payload, timeout=30)
-        
-        if create_response.status_code == 201:
-            create_data = create_response.json()
-            new_record_id = create_data.get("id")
-            logger.info(f"Created new PromptField record for '{attribute_name}': {new_record_id}")
-            return new_record_id
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to create PromptField record: {create_response.status_code} - {create_response.text}"
-            )
-            
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Failed to connect to Bubble API: {str(e)}"
-        )
+    }
 
-async def search_promptfield_only(attribute_name: str, environment: str = "version-test") -> Optional[str]:
-    """Search for PromptField by name, return record ID if found, None if not found (no creation)"""
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _collect_component_metrics():
+    """Cache hit ratios, circuit breaker state, outbound rate-limit queues and log drops, read from their stats at scrape time"""
+    cache_hits = Counter("cache_hits_total", "Lookups served from an in-memory cache", ("cache",))
+    cache_misses = Counter("cache_misses_total", "Lookups that missed an in-memory cache", ("cache",))
+    cache_hit_ratio = Gauge("cache_hit_ratio", "Hits / lookups of an in-memory cache since start", ("cache",))
+    cache_entries = Gauge("cache_entries", "Entries currently held by an in-memory cache", ("cache",))
+    caches = {
+        "promptfield": promptfield_cache.stats(),
+        "prompt_render": prompt_render_cache.stats(),
+        "search:sample": sample_search_cache.stats(),
+        **{f"record:{name}": stats for name, stats in record_cache_stats().items()}
+    }
+    for name, stats in caches.items():
+        cache_hits.inc((name,), stats["hits"])
+        cache_misses.inc((name,), stats["misses"])
+        cache_hit_ratio.set((name,), stats["hit_ratio"])
+        cache_entries.set((name,), stats["size"])
     
-    # Validate Bubble configuration
-    base_url = get_bubble_promptfield_base_url(environment)
-    if not base_url or not settings.BUBBLE_API_TOKEN:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Bubble PromptField API configuration is missing. Please check environment variables."
-        )
+    circuit_state = Gauge("bubble_circuit_state", "Circuit breaker state per environment (0 closed, 1 half-open, 2 open)", ("environment",))
+    for environment, stats in circuit_breaker_stats().items():
+        circuit_state.set((environment,), CIRCUIT_STATE_VALUES.get(stats["state"], 0))
     
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
+    rate_limit_waiting = Gauge("bubble_rate_limit_waiting", "Calls queued for an outbound rate-limit token", ("bucket",))
+    rate_limit_delayed = Counter("bubble_rate_limit_delayed_total", "Calls that had to queue for a rate-limit token", ("bucket",))
+    rate_limit_timeouts = Counter("bubble_rate_limit_timeouts_total", "Calls rejected after waiting too long for a rate-limit token", ("bucket",))
+    for bucket, stats in rate_limiter_stats().items():
+        rate_limit_waiting.set((bucket,), stats["waiting"])
+        rate_limit_delayed.inc((bucket,), stats["delayed"])
+        rate_limit_timeouts.inc((bucket,), stats["timeouts"])
     
-    # Search for existing record
-    search_params = {
-        "constraints": json.dumps([{
-            "key": "Name",
-            "constraint_type": "equals",
-            "value": attribute_name
-        }]),
-        "limit": 1
-    }
+    log_records_dropped = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+    log_records_dropped.inc((), logging_stats()["dropped"])
     
-    try:
-        # Search for existing record
-        search_response = requests.get(base_url, headers=headers, params=search_params, timeout=30)
-        
-        if search_response.status_code == 200:
-            search_data = search_response.json()
-            results = search_data.get("response", {}).get("results", [])
-            
-            if results:
-                # Record found, return its ID
-                record_id = results[0].get("_id")
-                logger.info(f"Found existing PromptField record for '{attribute_name}': {record_id}")
-                return record_id
-        
-        # No existing record found, return None
-        logger.info(f"No existing PromptField found for '{attribute_name}', skipping creation")
-        return None
-            
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Failed to connect to Bubble API: {str(e)}"
-        )
+    return [cache_hits, cache_misses, cache_hit_ratio, cache_entries, circuit_state, rate_limit_waiting, rate_limit_delayed, rate_limit_timeouts, log_records_dropped]
+
+metrics_registry.add_collector(_collect_component_metrics)
 
-@app.post("/bubble/generated-prompts/batch", tags=["bubble"])
+@app.get("/metrics", tags=["basic"], response_class=PlainTextResponse)
+async def get_metrics(api_key: str = Depends(get_api_key)):
+    """Prometheus text exposition: route and Bubble call latency histograms, in-flight gauges, bulk record counts and cache hit ratios"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/bubble/generated-prompts/batch", tags=["bubble"], response_model=BulkCreateResponse)
 async def create_generated_prompts_batch(
     batch_data: GeneratedPromptBatchCreate, 
     api_key: str = Depends(get_api_key)
@@ -282,122 +299,44 @@ async def create_generated_prompts_batch(
             detail="Bubble GeneratedPrompt API configuration is missing. Please check environment variables."
         )
     
-    # Format data as newline-separated JSON objects
-    bulk_data_lines = []
-    for record in batch_data.records:
-        record_json = {
+    # Records are streamed to Bubble as NDJSON in chunks
+    bulk_records = (
+        {
             "PromptField": record.promptfield_id,
             "Value": record.value
         }
-        bulk_data_lines.append(json.dumps(record_json))
-    
-    bulk_data = "\n".join(bulk_data_lines)
+        for record in batch_data.records
+    )
     
-    # Debug logging
     logger.info(f"GeneratedPrompt batch request data count: {len(batch_data.records)}")
-    logger.info(f"Bulk data lines: {bulk_data_lines}")
-    logger.info(f"Final bulk data: {repr(bulk_data)}")
-    
-    # Prepare request to bulk endpoint
-    url = f"{base_url}/bulk"
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "text/plain"
-    }
-    
-    logger.info(f"Making request to: {url}")
-    logger.info(f"Request headers: {headers}")
     
     try:
-        # Make request to Bubble API
-        response = requests.post(url, headers=headers, data=bulk_data, timeout=30)
+        # Upload through the chunked bulk engine
+        bulk_result = await bulk_create_records(
+            settings.BUBBLE_GENERATEDPROMPT_DATA_TYPE, bulk_records, batch_data.bubble_environment
+        )
         
-        # Debug response
-        logger.info(f"Response status code: {response.status_code}")
-        logger.info(f"Response headers: {dict(response.headers)}")
-        logger.info(f"Response content: {repr(response.content)}")
-        logger.info(f"Response text: {repr(response.text)}")
+        successful_count = bulk_result.successful_count
         
-        if response.status_code == 200:
-            try:
-                # Parse multi-line JSON response (one JSON object per line)
-                response_lines = response.text.strip().split('\n')
-                parsed_responses = []
-                
-                for line in response_lines:
-                    if line.strip():  # Skip empty lines
-                        parsed_responses.append(json.loads(line))
-                
-                logger.info(f"Successfully parsed {len(parsed_responses)} JSON responses: {parsed_responses}")
-                
-                # Extract created record IDs
-                created_ids = []
-                successful_count = 0
-                errors = []
-                
-                for resp in parsed_responses:
-                    if resp.get("status") == "success":
-                        successful_count += 1
-                        if "id" in resp:
-                            created_ids.append(resp["id"])
-                    else:
-                        errors.append(resp)
-                
-                return {
-                    "success": True,
-                    "message": f"Batch created {successful_count} out of {len(batch_data.records)} GeneratedPrompt records successfully",
-                    "requested_count": len(batch_data.records),
-                    "successful_count": successful_count,
-                    "created_ids": created_ids,
-                    "errors": errors,
-                    "detailed_responses": parsed_responses
-                }
-                
-            except json.JSONDecodeError as json_err:
-                logger.error(f"JSON decode error: {json_err}")
-                logger.error(f"Raw response: {response.text}")
-                return {
-                    "success": False,
-                    "message": "GeneratedPrompt batch request completed but response parsing failed",
-                    "generated_prompt_ids": [],
-                    "raw_response": response.text,
-                    "error": str(json_err)
-                }
-        elif response.status_code == 400:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid data provided: {response.text}"
-            )
-        elif response.status_code == 401:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Bubble API token"
-            )
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Permission denied. Check Bubble privacy rules and API settings."
-            )
-        else:
-            logger.error(f"Unexpected status code: {response.status_code}")
-            logger.error(f"Response text: {response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Bubble API error: {response.status_code} - {response.text}"
-            )
+        return {
+            "success": True,
+            "message": f"Batch created {successful_count} out of {len(batch_data.records)} GeneratedPrompt records successfully",
+            "requested_count": len(batch_data.records),
+            "successful_count": successful_count,
+            "created_ids": bulk_result.created_ids,
+            "errors": bulk_result.errors,
+            "detailed_responses": bulk_result.responses
+        }
             
-    except requests.exceptions.RequestException as e:
+    except BubbleAPIError as e:
+        logger.error(f"Unexpected status code: {e.status_code}")
+        raise http_exception_from_bubble_error(e)
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to connect to Bubble API: {str(e)}"
         )
-    except json.JSONDecodeError as json_err:
-        logger.error(f"JSON decode error in exception handler: {json_err}")
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Failed to parse Bubble API response: {str(json_err)}"
-        )
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         raise HTTPException(
@@ -405,7 +344,7 @@ async def create_generated_prompts_batch(
             detail=f"Unexpected error: {str(e)}"
         )
 
-@app.post("/bubble/promptfields-and-generated-prompts/batch", tags=["bubble"])
+@app.post("/bubble/promptfields-and-generated-prompts/batch", tags=["bubble"], response_model=PromptFieldAndGeneratedPromptBatchResponse, response_model_exclude_unset=True)
 async def create_promptfields_and_generated_prompts_batch(
     request_data: PromptFieldAndGeneratedPromptBatchCreate,
     api_key: str = Depends(get_api_key)
@@ -425,44 +364,49 @@ async def create_promptfields_and_generated_prompts_batch(
     
     logger.info(f"Processing {len(request_data.attributes)} attributes for PromptField search and GeneratedPrompt creation")
     
-    # Step 1: Process each attribute to search for existing PromptField and prepare GeneratedPrompt data
+    # Step 1: Search for existing PromptFields (no creation) for all attributes in one query
+    promptfield_ids_by_name, lookup_errors = await resolve_promptfield_ids(
+        [attr_value.attribute for attr_value in request_data.attributes],
+        request_data.bubble_environment
+    )
+    
+    # Prepare GeneratedPrompt data for each attribute whose PromptField was found
     for i, attr_value in enumerate(request_data.attributes):
-        try:
-            # Search for existing PromptField only (no creation)
-            promptfield_id = await search_promptfield_only(attr_value.attribute, request_data.bubble_environment)
-            
-            if promptfield_id:
-                # PromptField found, prepare GeneratedPrompt record
-                generated_prompt_records.append(GeneratedPromptCreate(
-                    promptfield_id=promptfield_id,
-                    value=attr_value.value
-                ))
-                
-                results.append({
-                    "attribute": attr_value.attribute,
-                    "value": attr_value.value,
-                    "promptfield_id": promptfield_id,
-                    "index": i
-                })
-            else:
-                # PromptField not found, skip this attribute
-                skipped.append({
-                    "attribute": attr_value.attribute,
-                    "value": attr_value.value,
-                    "index": i,
-                    "reason": "PromptField not found"
-                })
-                logger.info(f"Skipping attribute '{attr_value.attribute}' - PromptField not found")
-            
-        except Exception as e:
+        if attr_value.attribute in lookup_errors:
             error_detail = {
                 "attribute": attr_value.attribute,
                 "value": attr_value.value,
                 "index": i,
-                "error": str(e)
+                "error": lookup_errors[attr_value.attribute]
             }
             errors.append(error_detail)
-            logger.error(f"Error processing attribute '{attr_value.attribute}': {str(e)}")
+            logger.error(f"Error processing attribute '{attr_value.attribute}': {lookup_errors[attr_value.attribute]}")
+            continue
+        
+        promptfield_id = promptfield_ids_by_name[attr_value.attribute]
+        
+        if promptfield_id:
+            # PromptField found, prepare GeneratedPrompt record
+            generated_prompt_records.append(GeneratedPromptCreate(
+                promptfield_id=promptfield_id,
+                value=attr_value.value
+            ))
+            
+            results.append({
+                "attribute": attr_value.attribute,
+                "value": attr_value.value,
+                "promptfield_id": promptfield_id,
+                "index": i
+            })
+        else:
+            # PromptField not found, skip this attribute
+            skipped.append({
+                "attribute": attr_value.attribute,
+                "value": attr_value.value,
+                "index": i,
+                "reason": "PromptField not found"
+            })
+            logger.info(f"Skipping attribute '{attr_value.attribute}' - PromptField not found")
     
     # If we have no PromptFields found and no errors, return early
     if not generated_prompt_records and not errors:
@@ -503,91 +447,63 @@ async def create_promptfields_and_generated_prompts_batch(
                 detail="Bubble GeneratedPrompt API configuration is missing. Please check environment variables."
             )
         
-        # Format data as newline-separated JSON objects
-        bulk_data_lines = []
-        for record in generated_prompt_records:
-            record_json = {
-                "PromptField": record.promptfield_id,
-                "Value": record.value
-            }
-            bulk_data_lines.append(json.dumps(record_json))
-        
-        bulk_data = "\n".join(bulk_data_lines)
+        logger.info(f"Creating {len(generated_prompt_records)} GeneratedPrompt records")
         
-        # Prepare request to bulk endpoint
-        url = f"{base_url}/bulk"
-        headers = {
-            "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-            "Content-Type": "text/plain"
-        }
+        # Upload through the chunked bulk engine; response index i matches generated_prompt_records[i]
+        bulk_result = await bulk_create_records(
+            settings.BUBBLE_GENERATEDPROMPT_DATA_TYPE,
+            (
+                {
+                    "PromptField": record.promptfield_id,
+                    "Value": record.value
+                }
+                for record in generated_prompt_records
+            ),
+            request_data.bubble_environment
+        )
         
-        logger.info(f"Creating {len(generated_prompt_records)} GeneratedPrompt records")
+        # Extract created GeneratedPrompt IDs
+        generated_prompt_ids = []
+        successful_count = 0
+        creation_errors = []
         
-        # Make request to Bubble API
-        response = requests.post(url, headers=headers, data=bulk_data, timeout=30)
+        for i, resp in enumerate(bulk_result.responses):
+            if resp.get("status") == "success":
+                successful_count += 1
+                if "id" in resp:
+                    generated_prompt_ids.append(resp["id"])
+                    # Add the generated_prompt_id to our results
+                    results[i]["generated_prompt_id"] = resp["id"]
+            else:
+                creation_errors.append({
+                    "index": i,
+                    "error": resp,
+                    "attribute": results[i]["attribute"]
+                })
         
-        if response.status_code == 200:
-            try:
-                # Parse multi-line JSON response
-                response_lines = response.text.strip().split('\n')
-                parsed_responses = []
-                
-                for line in response_lines:
-                    if line.strip():
-                        parsed_responses.append(json.loads(line))
-                
-                # Extract created GeneratedPrompt IDs
-                generated_prompt_ids = []
-                successful_count = 0
-                creation_errors = []
-                
-                for i, resp in enumerate(parsed_responses):
-                    if resp.get("status") == "success":
-                        successful_count += 1
-                        if "id" in resp:
-                            generated_prompt_ids.append(resp["id"])
-                            # Add the generated_prompt_id to our results
-                            if i < len(results):
-                                results[i]["generated_prompt_id"] = resp["id"]
-                    else:
-                        creation_errors.append({
-                            "index": i,
-                            "error": resp,
-                            "attribute": results[i]["attribute"] if i < len(results) else "unknown"
-                        })
-                
-                return {
-                    "success": successful_count == len(generated_prompt_records),
-                    "message": f"Found {len(results)} PromptFields, skipped {len(skipped)}, successfully created {successful_count} GeneratedPrompt records",
-                    "total_attributes": len(request_data.attributes),
-                    "found_promptfields": len(results),
-                    "skipped_count": len(skipped),
-                    "generated_prompt_creation_successful": successful_count,
-                    "generated_prompt_ids": generated_prompt_ids,
-                    "detailed_results": results,
-                    "skipped": skipped,
-                    "creation_errors": creation_errors if creation_errors else None,
-                    "errors": errors if errors else None
-                }
-                
-            except json.JSONDecodeError as json_err:
-                logger.error(f"JSON decode error: {json_err}")
-                return {
-                    "success": False,
-                    "message": "GeneratedPrompt batch creation completed but response parsing failed",
-                    "generated_prompt_ids": [],
-                    "raw_response": response.text,
-                    "error": str(json_err),
-                    "skipped": skipped,
-                    "found_promptfields": len(results)
-                }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to create GeneratedPrompts: {response.status_code} - {response.text}"
-            )
+        return {
+            "success": successful_count == len(generated_prompt_records),
+            "message": f"Found {len(results)} PromptFields, skipped {len(skipped)}, successfully created {successful_count} GeneratedPrompt records",
+            "total_attributes": len(request_data.attributes),
+            "found_promptfields": len(results),
+            "skipped_count": len(skipped),
+            "generated_prompt_creation_successful": successful_count,
+            "generated_prompt_ids": generated_prompt_ids,
+            "detailed_results": results,
+            "skipped": skipped,
+            "creation_errors": creation_errors if creation_errors else None,
+            "errors": errors if errors else None
+        }
             
-    except requests.exceptions.RequestException as e:
+    except HTTPException:
+        # Re-raise HTTP exceptions as-is
+        raise
+    except BubbleAPIError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to create GeneratedPrompts: {e.status_code} - {e.text}"
+        )
+    except httpx.HTTPError as e:
         logger.error(f"Request exception during GeneratedPrompt creation: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -630,21 +546,16 @@ async def update_api_request(
         "GeneratedPrompts": update_data.generated_prompts
     }
     
-    # URL for the specific record
-    url = f"{base_url}/{request_id}"
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    logger.info(f"Updating API Request record {request_id} with payload: {payload}")
+    logger.info(f"Updating API Request record {request_id}: {summarize(payload)}")
     
     try:
         # Make PATCH request to Bubble API
-        response = requests.patch(url, headers=headers, json=payload, timeout=30)
+        response = await api_request_patches.patch(
+            settings.BUBBLE_API_REQUEST_DATA_TYPE, request_id, payload, update_data.bubble_environment
+        )
+        invalidate_cached_record(settings.BUBBLE_API_REQUEST_DATA_TYPE, request_id, update_data.bubble_environment)
         
         logger.info(f"Response status: {response.status_code}")
-        logger.info(f"Response content: {response.text}")
         
         if response.status_code in [200, 204]:
             # Handle both 200 (OK with content) and 204 (No Content - successful update)
@@ -698,7 +609,7 @@ async def update_api_request(
                 detail=f"Bubble API error: {response.status_code} - {response.text}"
             )
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -711,15 +622,147 @@ async def update_api_request(
             detail=f"Unexpected error: {str(e)}"
         )
 
+# Steps of the process-and-update pipeline, as reported in job status
+PROCESS_AND_UPDATE_STEPS = ["promptfield_search", "generatedprompt_creation", "api_request_update"]
+
 @app.post("/bubble/api-requests/process-and-update", tags=["bubble"])
 async def process_and_update_api_request(
     request_data: ApiRequestProcessAndUpdate,
+    response: Response,
+    async_mode: bool = False,
     api_key: str = Depends(get_api_key)
 ):
-    """Search for existing PromptFields (no creation) and create GeneratedPrompts, then update the API Request record with the results"""
+    """Search for existing PromptFields (no creation) and create GeneratedPrompts, then update the API Request record with the results.
+    Pass ?async_mode=true to get a 202 with a job ID right away and poll /bubble/api-requests/jobs/{job_id} for progress."""
+    
+    if not async_mode:
+        return await run_process_and_update(request_data, Job("process_and_update", PROCESS_AND_UPDATE_STEPS))
+    
+    try:
+        job = job_queue.submit(
+            "process_and_update",
+            lambda job: run_process_and_update(request_data, job),
+            PROCESS_AND_UPDATE_STEPS
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{str(e)}. Please retry later."
+        )
+    
+    logger.info(f"Queued process-and-update job {job.id} for API Request {request_data.request_id}")
+    
+    response.status_code = status.HTTP_202_ACCEPTED
+    return {
+        "success": True,
+        "message": f"Processing of API Request {request_data.request_id} has been queued",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/bubble/api-requests/jobs/{job.id}"
+    }
+
+@app.get("/bubble/api-requests/jobs/{job_id}", tags=["bubble"])
+async def get_process_and_update_job(job_id: str, api_key: str = Depends(get_api_key)):
+    """Get the status, per-step progress and final result of a queued process-and-update job"""
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found or expired"
+        )
+    
+    return {
+        "success": True,
+        **job.to_dict(),
+        "queue": job_queue.stats()
+    }
+
+async def _search_promptfields_for_attributes(
+    request_data: ApiRequestProcessAndUpdate,
+    job: Job
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Look up existing PromptFields (no creation) for all attributes in one query.
+    Returns (found results, skipped attributes, failure response or None)."""
+    
+    promptfield_results = []
+    skipped_attributes = []
+    promptfield_errors = []
+    
+    promptfield_ids_by_name, lookup_errors = await resolve_promptfield_ids(
+        [attr_value.attribute for attr_value in request_data.attributes],
+        request_data.bubble_environment
+    )
+    
+    for i, attr_value in enumerate(request_data.attributes):
+        if attr_value.attribute in lookup_errors:
+            error_detail = {
+                "attribute": attr_value.attribute,
+                "value": attr_value.value,
+                "index": i,
+                "error": lookup_errors[attr_value.attribute]
+            }
+            promptfield_errors.append(error_detail)
+            logger.error(f"Error processing attribute '{attr_value.attribute}': {lookup_errors[attr_value.attribute]}")
+            continue
+        
+        promptfield_id = promptfield_ids_by_name[attr_value.attribute]
+        
+        if promptfield_id:
+            # PromptField found, a GeneratedPrompt will be created for it
+            promptfield_results.append({
+                "attribute": attr_value.attribute,
+                "value": attr_value.value,
+                "promptfield_id": promptfield_id,
+                "index": i
+            })
+        else:
+            # PromptField not found, skip this attribute
+            skipped_attributes.append({
+                "attribute": attr_value.attribute,
+                "value": attr_value.value,
+                "index": i,
+                "reason": "PromptField not found"
+            })
+            logger.info(f"Skipping attribute '{attr_value.attribute}' - PromptField not found")
+    
+    # If we have errors in PromptField processing, return early
+    if promptfield_errors:
+        job.fail_step("promptfield_search", error_count=len(promptfield_errors))
+        return promptfield_results, skipped_attributes, {
+            "success": False,
+            "message": f"Failed to process {len(promptfield_errors)} out of {len(request_data.attributes)} attributes",
+            "step": "promptfield_processing",
+            "total_processed": len(request_data.attributes),
+            "found_promptfields": len(promptfield_results),
+            "skipped_count": len(skipped_attributes),
+            "error_count": len(promptfield_errors),
+            "errors": promptfield_errors,
+            "skipped": skipped_attributes
+        }
+    
+    job.complete_step(
+        "promptfield_search",
+        found_promptfields=len(promptfield_results),
+        skipped_count=len(skipped_attributes)
+    )
+    
+    return promptfield_results, skipped_attributes, None
+
+async def run_process_and_update(request_data: ApiRequestProcessAndUpdate, job: Job) -> Dict[str, Any]:
+    """Run the search -> bulk create -> PATCH pipeline, reporting step progress on `job`.
+    
+    Completed steps are recorded in the step journal under the request ID, so a retry with
+    the same input resumes from the first incomplete step instead of recreating GeneratedPrompts.
+    Runs for the same request are serialized, so a retry that overlaps the original waits for it."""
+    
+    async with process_journal.run_lock(request_data.bubble_environment, request_data.request_id):
+        return await _process_and_update_steps(request_data, job)
+
+async def _process_and_update_steps(request_data: ApiRequestProcessAndUpdate, job: Job) -> Dict[str, Any]:
+    """Load the journal, run the steps it hasn't recorded yet and journal each one as it completes"""
     
     try:
-        # Step 1: Search for existing PromptFields and create GeneratedPrompts
         logger.info(f"Processing {len(request_data.attributes)} attributes for API Request {request_data.request_id}")
         
         if not settings.BUBBLE_PROMPTFIELD_DATA_TYPE or not settings.BUBBLE_GENERATEDPROMPT_DATA_TYPE:
@@ -728,66 +771,49 @@ async def process_and_update_api_request(
                 detail="BUBBLE_PROMPTFIELD_DATA_TYPE or BUBBLE_GENERATEDPROMPT_DATA_TYPE is not configured."
             )
         
-        generated_prompt_records = []
-        promptfield_results = []
-        skipped_attributes = []
-        promptfield_errors = []
-        
-        # Process each attribute to search for existing PromptField and prepare GeneratedPrompt data
-        for i, attr_value in enumerate(request_data.attributes):
-            try:
-                # Search for existing PromptField only (no creation)
-                promptfield_id = await search_promptfield_only(attr_value.attribute, request_data.bubble_environment)
-                
-                if promptfield_id:
-                    # PromptField found, prepare GeneratedPrompt record
-                    generated_prompt_records.append(GeneratedPromptCreate(
-                        promptfield_id=promptfield_id,
-                        value=attr_value.value
-                    ))
-                    
-                    promptfield_results.append({
-                        "attribute": attr_value.attribute,
-                        "value": attr_value.value,
-                        "promptfield_id": promptfield_id,
-                        "index": i
-                    })
-                else:
-                    # PromptField not found, skip this attribute
-                    skipped_attributes.append({
-                        "attribute": attr_value.attribute,
-                        "value": attr_value.value,
-                        "index": i,
-                        "reason": "PromptField not found"
-                    })
-                    logger.info(f"Skipping attribute '{attr_value.attribute}' - PromptField not found")
-                
-            except Exception as e:
-                error_detail = {
-                    "attribute": attr_value.attribute,
-                    "value": attr_value.value,
-                    "index": i,
-                    "error": str(e)
-                }
-                promptfield_errors.append(error_detail)
-                logger.error(f"Error processing attribute '{attr_value.attribute}': {str(e)}")
+        # Load what an earlier attempt for this request already completed
+        fingerprint = request_fingerprint(request_data.model_dump())
+        journal = await process_journal.load(request_data.bubble_environment, request_data.request_id, fingerprint) or {}
+        
+        async def record_progress(**updates):
+            journal.update(updates)
+            await process_journal.save(request_data.bubble_environment, request_data.request_id, fingerprint, journal)
+        
+        if journal.get("result"):
+            logger.info(f"API Request {request_data.request_id} was already processed, returning the journaled result")
+            for step_name in PROCESS_AND_UPDATE_STEPS:
+                job.complete_step(step_name, resumed=True)
+            return {**journal["result"], "resumed_from_journal": True}
+        
+        # Step 1: Search for existing PromptFields
+        job.start_step("promptfield_search")
+        
+        if "promptfield_results" in journal:
+            # PromptField IDs (and any GeneratedPrompt IDs created so far) come from the earlier attempt
+            promptfield_results = journal["promptfield_results"]
+            skipped_attributes = journal["skipped"]
+            logger.info(f"Resuming API Request {request_data.request_id} with {len(promptfield_results)} journaled PromptField IDs")
+            job.complete_step(
+                "promptfield_search",
+                found_promptfields=len(promptfield_results),
+                skipped_count=len(skipped_attributes),
+                resumed=True
+            )
+        else:
+            promptfield_results, skipped_attributes, failure = await _search_promptfields_for_attributes(request_data, job)
+            if failure:
+                return failure
+            await record_progress(promptfield_results=promptfield_results, skipped=skipped_attributes)
         
-        # If we have errors in PromptField processing, return early
-        if promptfield_errors:
-            return {
-                "success": False,
-                "message": f"Failed to process {len(promptfield_errors)} out of {len(request_data.attributes)} attributes",
-                "step": "promptfield_processing",
-                "total_processed": len(request_data.attributes),
-                "found_promptfields": len(promptfield_results),
-                "skipped_count": len(skipped_attributes),
-                "error_count": len(promptfield_errors),
-                "errors": promptfield_errors,
-                "skipped": skipped_attributes
-            }
+        generated_prompt_records = [
+            GeneratedPromptCreate(promptfield_id=result["promptfield_id"], value=result["value"])
+            for result in promptfield_results
+        ]
         
         # If no PromptFields were found, update API Request with empty results
         if not generated_prompt_records:
+            job.skip_step("generatedprompt_creation", "No matching PromptFields")
+            job.start_step("api_request_update")
             logger.info(f"No existing PromptFields found for any attributes, updating API Request {request_data.request_id} with empty results")
             
             # Get API Request base URL
@@ -808,18 +834,16 @@ async def process_and_update_api_request(
                 "Request Status": "Completed - No Matching PromptFields"
             }
             
-            # URL for the specific API Request record
-            update_url = f"{api_request_base_url}/{request_data.request_id}"
-            update_headers = {
-                "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-                "Content-Type": "application/json"
-            }
-            
             # Make PATCH request to update API Request
-            update_response = requests.patch(update_url, headers=update_headers, json=update_payload, timeout=30)
+            update_response = await api_request_patches.patch(
+                settings.BUBBLE_API_REQUEST_DATA_TYPE, request_data.request_id, update_payload, request_data.bubble_environment
+            )
+            invalidate_cached_record(settings.BUBBLE_API_REQUEST_DATA_TYPE, request_data.request_id, request_data.bubble_environment)
             
             if update_response.status_code not in [200, 204]:
                 logger.error(f"Failed to update API Request: {update_response.text}")
+                job.fail_step("api_request_update", http_status=update_response.status_code)
+                await record_progress(patch_status=update_response.status_code)
                 return {
                     "success": False,
                     "message": f"No PromptFields found and failed to update API Request: {update_response.status_code}",
@@ -827,7 +851,8 @@ async def process_and_update_api_request(
                     "update_error": update_response.text
                 }
             
-            return {
+            job.complete_step("api_request_update", http_status=update_response.status_code)
+            result = {
                 "success": True,
                 "message": f"No existing PromptFields found for any of {len(request_data.attributes)} attributes, API Request updated with empty results",
                 "request_id": request_data.request_id,
@@ -838,9 +863,13 @@ async def process_and_update_api_request(
                 "skipped": skipped_attributes,
                 "api_request_update_status": update_response.status_code
             }
+            await record_progress(patch_status=update_response.status_code, result=result)
+            return result
         
-        # Step 2: Batch create GeneratedPrompts
-        logger.info(f"Creating {len(generated_prompt_records)} GeneratedPrompt records")
+        # Step 2: Batch create GeneratedPrompts, skipping any an earlier attempt already created
+        pending_indexes = [i for i, result in enumerate(promptfield_results) if "generated_prompt_id" not in result]
+        logger.info(f"Creating {len(pending_indexes)} of {len(generated_prompt_records)} GeneratedPrompt records")
+        job.start_step("generatedprompt_creation")
         
         base_url = get_bubble_generatedprompt_base_url(request_data.bubble_environment)
         if not base_url or not settings.BUBBLE_API_TOKEN:
@@ -849,62 +878,55 @@ async def process_and_update_api_request(
                 detail="Bubble GeneratedPrompt API configuration is missing."
             )
         
-        # Format data as newline-separated JSON objects
-        bulk_data_lines = []
-        for record in generated_prompt_records:
-            record_json = {
-                "PromptField": record.promptfield_id,
-                "Value": record.value
-            }
-            bulk_data_lines.append(json.dumps(record_json))
-        
-        bulk_data = "\n".join(bulk_data_lines)
-        
-        # Prepare request to bulk endpoint
-        url = f"{base_url}/bulk"
-        headers = {
-            "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-            "Content-Type": "text/plain"
-        }
-        
-        # Make request to Bubble API for GeneratedPrompts
-        response = requests.post(url, headers=headers, data=bulk_data, timeout=30)
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to create GeneratedPrompts: {response.status_code} - {response.text}"
-            )
-        
-        # Parse GeneratedPrompt creation response
-        response_lines = response.text.strip().split('\n')
-        parsed_responses = []
-        
-        for line in response_lines:
-            if line.strip():
-                parsed_responses.append(json.loads(line))
-        
-        # Extract created GeneratedPrompt IDs
-        generated_prompt_ids = []
-        successful_gp_count = 0
         gp_creation_errors = []
         
-        for i, resp in enumerate(parsed_responses):
-            if resp.get("status") == "success":
-                successful_gp_count += 1
-                if "id" in resp:
-                    generated_prompt_ids.append(resp["id"])
+        if pending_indexes:
+            # Upload GeneratedPrompts through the chunked bulk engine; response index j matches pending_indexes[j]
+            try:
+                bulk_result = await bulk_create_records(
+                    settings.BUBBLE_GENERATEDPROMPT_DATA_TYPE,
+                    (
+                        {
+                            "PromptField": generated_prompt_records[i].promptfield_id,
+                            "Value": generated_prompt_records[i].value
+                        }
+                        for i in pending_indexes
+                    ),
+                    request_data.bubble_environment
+                )
+            except BubbleAPIError as e:
+                job.fail_step("generatedprompt_creation", http_status=e.status_code)
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Failed to create GeneratedPrompts: {e.status_code} - {e.text}"
+                )
+            
+            for i, resp in zip(pending_indexes, bulk_result.responses):
+                if resp.get("status") == "success" and "id" in resp:
                     # Add the generated_prompt_id to our results
-                    if i < len(promptfield_results):
-                        promptfield_results[i]["generated_prompt_id"] = resp["id"]
-            else:
-                gp_creation_errors.append({
-                    "index": i,
-                    "error": resp,
-                    "attribute": promptfield_results[i]["attribute"] if i < len(promptfield_results) else "unknown"
-                })
+                    promptfield_results[i]["generated_prompt_id"] = resp["id"]
+                else:
+                    gp_creation_errors.append({
+                        "index": i,
+                        "error": resp,
+                        "attribute": promptfield_results[i]["attribute"]
+                    })
+            
+            # Journal the IDs created so far, even on partial failure, so a retry only creates the rest
+            await record_progress(promptfield_results=promptfield_results)
+        
+        # Collect created GeneratedPrompt IDs in attribute order, including those from an earlier attempt
+        generated_prompt_ids = [
+            result["generated_prompt_id"] for result in promptfield_results if "generated_prompt_id" in result
+        ]
+        successful_gp_count = len(generated_prompt_ids)
         
         if gp_creation_errors:
+            job.fail_step(
+                "generatedprompt_creation",
+                successful_count=successful_gp_count,
+                error_count=len(gp_creation_errors)
+            )
             return {
                 "success": False,
                 "message": f"Failed to create {len(gp_creation_errors)} GeneratedPrompt records",
@@ -916,8 +938,15 @@ async def process_and_update_api_request(
                 "skipped": skipped_attributes
             }
         
+        job.complete_step(
+            "generatedprompt_creation",
+            successful_count=successful_gp_count,
+            reused_count=len(generated_prompt_records) - len(pending_indexes)
+        )
+        
         # Step 3: Update API Request record with the results
         logger.info(f"Updating API Request {request_data.request_id} with {len(generated_prompt_ids)} GeneratedPrompt IDs")
+        job.start_step("api_request_update")
         
         # Get API Request base URL
         api_request_base_url = get_bubble_api_request_base_url(request_data.bubble_environment)
@@ -942,36 +971,21 @@ async def process_and_update_api_request(
             "Request Status": "Completed"
         }
         
-        # Console log the update payload details
-        logger.info(f"API Request update payload details:")
-        logger.info(f"  - Request ID: {request_data.request_id}")
-        logger.info(f"  - Environment: {request_data.bubble_environment}")
-        logger.info(f"  - Update URL: {api_request_base_url}/{request_data.request_id}")
-        logger.info(f"  - JSON Prompt count: {len(json_prompt_formatted)}")
-        logger.info(f"  - GeneratedPrompt IDs: {generated_prompt_ids}")
-        logger.info(f"  - GeneratedPrompt IDs count: {len(generated_prompt_ids)}")
-        logger.info(f"  - Full update payload: {update_payload}")
-        
-        # URL for the specific API Request record
-        update_url = f"{api_request_base_url}/{request_data.request_id}"
-        update_headers = {
-            "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        
-        logger.info(f"Making PATCH request to update API Request...")
-        logger.info(f"  - Headers: {update_headers}")
+        logger.info(f"PATCH API Request {request_data.request_id} in {request_data.bubble_environment}: {summarize(update_payload)}")
         
         # Make PATCH request to update API Request
-        update_response = requests.patch(update_url, headers=update_headers, json=update_payload, timeout=30)
+        update_response = await api_request_patches.patch(
+            settings.BUBBLE_API_REQUEST_DATA_TYPE, request_data.request_id, update_payload, request_data.bubble_environment
+        )
+        invalidate_cached_record(settings.BUBBLE_API_REQUEST_DATA_TYPE, request_data.request_id, request_data.bubble_environment)
         
         logger.info(f"API Request update response status: {update_response.status_code}")
-        logger.info(f"API Request update response headers: {dict(update_response.headers)}")
-        logger.info(f"API Request update response content: {update_response.text}")
         
         if update_response.status_code not in [200, 204]:
             logger.error(f"Failed to update API Request: {update_response.text}")
-            logger.error(f"Update payload that failed: {update_payload}")
+            logger.error(f"Update payload that failed: {summarize(update_payload)}")
+            job.fail_step("api_request_update", http_status=update_response.status_code)
+            await record_progress(patch_status=update_response.status_code)
             return {
                 "success": False,
                 "message": f"Successfully created GeneratedPrompts, but failed to update API Request: {update_response.status_code}",
@@ -993,10 +1007,10 @@ async def process_and_update_api_request(
             api_response_data = update_response.json()
         
         logger.info(f"Successfully updated API Request {request_data.request_id}")
-        logger.info(f"API Request update response data: {api_response_data}")
+        job.complete_step("api_request_update", http_status=update_response.status_code)
 
         # Return comprehensive success response
-        return {
+        result = {
             "success": True,
             "message": f"Successfully processed {len(request_data.attributes)} attributes and updated API Request {request_data.request_id}",
             "request_id": request_data.request_id,
@@ -1011,11 +1025,13 @@ async def process_and_update_api_request(
             "skipped": skipped_attributes,
             "api_request_response": api_response_data
         }
+        await record_progress(patch_status=update_response.status_code, result=result)
+        return result
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -1030,77 +1046,51 @@ async def process_and_update_api_request(
 
 @app.get("/prompts/{prompt_name}", tags=["prompts"], response_model=PromptResponse)
 async def get_prompt(prompt_name: str, api_key: str = Depends(get_api_key)):
-    """Get a prompt by name from stored text files"""
-    
-    # Define the prompts directory
-    prompts_dir = Path("prompts")
+    """Get a prompt by name from stored text files (served from the in-memory prompt registry)"""
     
     # Sanitize the prompt name to prevent directory traversal
     safe_prompt_name = "".join(c for c in prompt_name if c.isalnum() or c in ('-', '_', '.'))
     
-    # Look for the prompt file with .txt extension
-    prompt_file = prompts_dir / f"{safe_prompt_name}.txt"
-    
-    # Check if file exists
-    if not prompt_file.exists():
+    prompt = prompt_registry.get(safe_prompt_name)
+    if prompt is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Prompt '{prompt_name}' not found"
         )
     
-    try:
-        # Read the prompt content
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            prompt_content = f.read()
-        
-        return PromptResponse(
-            success=True,
-            prompt_name=prompt_name,
-            content=prompt_content,
-            file_path=str(prompt_file)
-        )
-        
-    except Exception as e:
-        logger.error(f"Error reading prompt file '{prompt_file}': {str(e)}")
+    if prompt.error is not None:
+        logger.error(f"Error reading prompt file '{prompt.file_path}': {prompt.error}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to read prompt file: {str(e)}"
+            detail=f"Failed to read prompt file: {prompt.error}"
         )
+    
+    return PromptResponse(
+        success=True,
+        prompt_name=prompt_name,
+        content=prompt.content,
+        file_path=prompt.file_path
+    )
 
 @app.get("/prompts", tags=["prompts"], response_model=PromptListResponse)
 async def list_prompts(api_key: str = Depends(get_api_key)):
-    """List all available prompts"""
-    
-    prompts_dir = Path("prompts")
-    
-    # Create prompts directory if it doesn't exist
-    prompts_dir.mkdir(exist_ok=True)
+    """List all available prompts (size and preview are precomputed by the prompt registry)"""
     
     try:
-        # Get all .txt files in the prompts directory
-        prompt_files = list(prompts_dir.glob("*.txt"))
-        
         prompts = []
-        for prompt_file in prompt_files:
-            prompt_name = prompt_file.stem  # filename without extension
-            try:
-                # Get basic info about each prompt
-                with open(prompt_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    preview = content[:100] + "..." if len(content) > 100 else content
-                
+        for prompt in prompt_registry.list():
+            if prompt.error is not None:
                 prompts.append(PromptListItem(
-                    name=prompt_name,
-                    file_path=str(prompt_file),
-                    size_chars=len(content),
-                    preview=preview
+                    name=prompt.name,
+                    file_path=prompt.file_path,
+                    error=prompt.error
                 ))
-            except Exception as e:
-                logger.warning(f"Could not read prompt file '{prompt_file}': {str(e)}")
+            else:
                 prompts.append(PromptListItem(
-                    name=prompt_name,
-                    file_path=str(prompt_file),
-                    error=str(e)
+                    name=prompt.name,
+                    file_path=prompt.file_path,
+                    size_chars=prompt.size_chars,
+                    preview=prompt.preview
                 ))
         
         return PromptListResponse(
@@ -1116,6 +1106,63 @@ async def list_prompts(api_key: str = Depends(get_api_key)):
             detail=f"Failed to list prompts: {str(e)}"
         )
 
+@app.post("/bubble/{data_type}/batch-get", tags=["bubble"], response_model=BubbleRecordBatchGetResponse)
+async def batch_get_bubble_records(
+    data_type: str,
+    batch_data: BubbleRecordBatchGet,
+    api_key: str = Depends(get_api_key)
+):
+    """Get many Bubble records of one data type by ID using `_id in` searches (single GETs only as a fallback).
+    Records and missing IDs are returned in request order."""
+    
+    # Validate Bubble configuration
+    base_url = get_bubble_generic_base_url(data_type, batch_data.bubble_environment)
+    if not base_url or not settings.BUBBLE_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Bubble API configuration is missing. Please check environment variables."
+        )
+    
+    # Sanitize data_type to prevent potential issues
+    safe_data_type = "".join(c for c in data_type if c.isalnum() or c in ('-', '_'))
+    if safe_data_type != data_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid data type format. Only alphanumeric characters, hyphens, and underscores are allowed."
+        )
+    
+    if len(batch_data.record_ids) > settings.BUBBLE_BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many record IDs ({len(batch_data.record_ids)}). At most {settings.BUBBLE_BATCH_GET_MAX_IDS} are allowed per request."
+        )
+    
+    logger.info(f"Fetching {len(batch_data.record_ids)} {data_type} records from environment: {batch_data.bubble_environment}")
+    
+    try:
+        records, missing_ids, errors = await fetch_records_by_ids(
+            data_type, batch_data.record_ids, batch_data.bubble_environment
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected error: {str(e)}"
+        )
+    
+    return {
+        "success": not errors,
+        "message": f"Found {len(records)} of {len(dict.fromkeys(batch_data.record_ids))} {data_type} records",
+        "data_type": data_type,
+        "environment": batch_data.bubble_environment,
+        "found_count": len(records),
+        "missing_count": len(missing_ids),
+        "error_count": len(errors),
+        "records": records,
+        "missing_ids": missing_ids,
+        "errors": errors
+    }
+
 @app.get("/bubble/{data_type}/{record_id}", tags=["bubble"])
 async def get_bubble_record(
     data_type: str,
@@ -1141,68 +1188,53 @@ async def get_bubble_record(
             detail="Invalid data type format. Only alphanumeric characters, hyphens, and underscores are allowed."
         )
     
-    # Prepare headers
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    # URL for the specific record
-    url = f"{base_url}/{record_id}"
-    
     logger.info(f"Fetching {data_type} record with ID: {record_id} from environment: {environment}")
     
     try:
-        # Make GET request to Bubble API
-        response = requests.get(url, headers=headers, timeout=30)
+        record_cache = get_record_cache(data_type)
+        if record_cache is not None:
+            # Cached data type: concurrent reads of the same record share one upstream GET
+            record = await record_cache.get(data_type, record_id, environment)
+        else:
+            # Make GET request to Bubble API
+            response = await get_bubble_client().get(data_type, record_id, environment)
+            
+            logger.info(f"Response status: {response.status_code}")
+            
+            if response.status_code != 200:
+                raise BubbleAPIError(response.status_code, response.text)
+            
+            record_data = response.json()
+            record = record_data.get("response", record_data)
         
-        logger.info(f"Response status: {response.status_code}")
+        return {
+            "success": True,
+            "message": f"Successfully retrieved {data_type} record",
+            "data_type": data_type,
+            "record_id": record_id,
+            "environment": environment,
+            "record": record
+        }
         
-        if response.status_code == 200:
-            try:
-                record_data = response.json()
-                
-                return {
-                    "success": True,
-                    "message": f"Successfully retrieved {data_type} record",
-                    "data_type": data_type,
-                    "record_id": record_id,
-                    "environment": environment,
-                    "record": record_data.get("response", record_data)
-                }
-                
-            except json.JSONDecodeError as json_err:
-                logger.error(f"JSON decode error: {json_err}")
-                logger.error(f"Raw response: {response.text}")
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Failed to parse Bubble API response: {str(json_err)}"
-                )
-                
-        elif response.status_code == 401:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Bubble API token"
-            )
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Permission denied. Check Bubble privacy rules and API settings."
-            )
-        elif response.status_code == 404:
+    except BubbleAPIError as e:
+        if e.status_code == 404:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Record with ID '{record_id}' not found in data type '{data_type}'"
             )
-        else:
-            logger.error(f"Unexpected status code: {response.status_code}")
-            logger.error(f"Response text: {response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Bubble API error: {response.status_code} - {response.text}"
-            )
-            
-    except requests.exceptions.RequestException as e:
+        if e.status_code not in (401, 403):
+            logger.error(f"Unexpected status code: {e.status_code}")
+            logger.error(f"Response text: {e.text}")
+        raise http_exception_from_bubble_error(e)
+    except json.JSONDecodeError as json_err:
+        logger.error(f"JSON decode error: {json_err}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to parse Bubble API response: {str(json_err)}"
+        )
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -1226,20 +1258,22 @@ async def get_processed_prompt_with_template(
     """Get a prompt by name and process it with JSON template from PromptTemplate or PromptTemplateCustom record"""
     
     try:
-        # Step 1: Get the prompt file content
-        prompts_dir = Path("prompts")
+        # Step 1: Get the prompt content from the in-memory prompt registry
         safe_prompt_name = "".join(c for c in prompt_name if c.isalnum() or c in ('-', '_', '.'))
-        prompt_file = prompts_dir / f"{safe_prompt_name}.txt"
+        prompt = prompt_registry.get(safe_prompt_name)
         
-        if not prompt_file.exists():
+        if prompt is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Prompt '{prompt_name}' not found"
             )
+        if prompt.error is not None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to read prompt file: {prompt.error}"
+            )
         
-        # Read the prompt content
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            original_prompt_content = f.read()
+        original_prompt_content = prompt.content
         
         # Step 2: Determine which data type and record ID to use
         if prompttemplatecustom_id:
@@ -1265,7 +1299,7 @@ async def get_processed_prompt_with_template(
                     detail="BUBBLE_PROMPTTEMPLATE_DATA_TYPE is not configured. Please check environment variables."
                 )
         
-        # Step 3: Get the template record from Bubble
+        # Step 3: Get the template record (read-through cache, served stale while Bubble is re-checked)
         base_url = get_bubble_generic_base_url(data_type, environment)
         if not base_url or not settings.BUBBLE_API_TOKEN:
             raise HTTPException(
@@ -1273,65 +1307,36 @@ async def get_processed_prompt_with_template(
                 detail="Bubble API configuration is missing. Please check environment variables."
             )
         
-        headers = {
-            "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        
-        # URL for the specific template record
-        url = f"{base_url}/{record_id}"
-        
-        logger.info(f"Fetching {template_source} record with ID: {record_id} from environment: {environment}")
-        
-        # Make GET request to Bubble API
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        if response.status_code == 200:
-            try:
-                template_data = response.json()
-                template_record = template_data.get("response", template_data)
-                
-                # Extract the json_template field
-                json_template = template_record.get("json_template", "")
-                
-                if not json_template:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"{template_source} record '{record_id}' does not have a json_template field or it's empty"
-                    )
-                
-            except json.JSONDecodeError as json_err:
-                logger.error(f"JSON decode error: {json_err}")
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Failed to parse Bubble API response: {str(json_err)}"
-                )
-                
-        elif response.status_code == 401:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Bubble API token"
-            )
-        elif response.status_code == 403:
+        try:
+            template_record = await template_record_cache.get(data_type, record_id, environment)
+        except json.JSONDecodeError as json_err:
+            logger.error(f"JSON decode error: {json_err}")
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Permission denied. Check Bubble privacy rules and API settings."
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to parse Bubble API response: {str(json_err)}"
             )
-        elif response.status_code == 404:
+        except BubbleAPIError as e:
+            if e.status_code == 404:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"{template_source} record with ID '{record_id}' not found"
+                )
+            if e.status_code not in (401, 403):
+                logger.error(f"Unexpected status code: {e.status_code}")
+                logger.error(f"Response text: {e.text}")
+            raise http_exception_from_bubble_error(e)
+        
+        # Extract the json_template field
+        json_template = template_record.get("json_template", "")
+        
+        if not json_template:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"{template_source} record with ID '{record_id}' not found"
-            )
-        else:
-            logger.error(f"Unexpected status code: {response.status_code}")
-            logger.error(f"Response text: {response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Bubble API error: {response.status_code} - {response.text}"
+                detail=f"{template_source} record '{record_id}' does not have a json_template field or it's empty"
             )
         
-        # Step 4: Replace {{JSON_STRUCTURE}} placeholder in the prompt
-        processed_content = original_prompt_content.replace("{{JSON_STRUCTURE}}", json_template)
+        # Step 4: Fill {{JSON_STRUCTURE}} and any other {{NAME}} placeholders from the template record
+        processed_content = render_prompt_with_template(prompt, template_record, record_id, environment)
         
         logger.info(f"Successfully processed prompt '{prompt_name}' with {template_source} '{record_id}'")
         
@@ -1342,13 +1347,13 @@ async def get_processed_prompt_with_template(
             original_content=original_prompt_content,
             processed_content=processed_content,
             json_template=json_template,
-            file_path=str(prompt_file)
+            file_path=prompt.file_path
         )
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 class AttributeValue(BaseModel):
     """Model for attribute-value pair"""
@@ -87,6 +87,23 @@ class BubbleRecordBatchCreate(BaseModel):
         }
     }
 
+class BubbleRecordBatchGet(BaseModel):
+    """Model for fetching many records of one data type by ID"""
+    record_ids: List[str]
+    bubble_environment: Literal["production", "version-test"] = "version-test"
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "record_ids": [
+                    "1755878226412x138224706807443800",
+                    "1755878226413x138224706807443801"
+                ],
+                "bubble_environment": "version-test"
+            }
+        }
+    }
+
 class BubbleRecordUpdateListField(BaseModel):
     """Model for updating a list field in a Bubble record"""
     sample2_id: str
@@ -101,6 +118,23 @@ class BubbleRecordUpdateListField(BaseModel):
         }
     }
 
+class BubbleRecordUpdateListFieldBatch(BaseModel):
+    """Model for appending many IDs to a list field in a Bubble record"""
+    sample2_ids: List[str]
+    bubble_environment: Literal["production", "version-test"] = "version-test"
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "sample2_ids": [
+                    "1755912306378x688197843685340200",
+                    "1755919121078x981069894958858800"
+                ],
+                "bubble_environment": "version-test"
+            }
+        }
+    }
+
 class GeneratedPromptCreate(BaseModel):
     """Model for creating a new GeneratedPrompt record"""
     promptfield_id: str
@@ -329,3 +363,92 @@ class PromptTemplateProcessedResponse(BaseModel):
             }
         }
     }
+
+class BulkCreateResponse(BaseModel):
+    """Model for batch create responses; detailed_responses holds Bubble's bulk reply line for each record, in request order"""
+    success: bool
+    message: str
+    requested_count: int
+    successful_count: int
+    created_ids: List[str]
+    errors: List[Dict[str, Any]]
+    detailed_responses: List[Dict[str, Any]]
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "success": True,
+                "message": "Batch created 2 out of 2 records successfully",
+                "requested_count": 2,
+                "successful_count": 2,
+                "created_ids": ["1755923027740x713483466029849500", "1755923027741x713483466029849501"],
+                "errors": [],
+                "detailed_responses": [
+                    {"status": "success", "id": "1755923027740x713483466029849500"},
+                    {"status": "success", "id": "1755923027741x713483466029849501"}
+                ]
+            }
+        }
+    }
+
+class PromptFieldResult(BaseModel):
+    """Model for an attribute resolved to a PromptField (and the GeneratedPrompt created for it, if any)"""
+    attribute: str
+    value: str
+    promptfield_id: str
+    index: int
+    generated_prompt_id: Optional[str] = None
+
+class PromptFieldSkipped(BaseModel):
+    """Model for an attribute skipped because no PromptField matched it"""
+    attribute: str
+    value: str
+    index: int
+    reason: str
+
+class PromptFieldLookupError(BaseModel):
+    """Model for an attribute whose PromptField lookup failed"""
+    attribute: str
+    value: str
+    index: int
+    error: str
+
+class PromptFieldBatchResponse(BaseModel):
+    """Model for the PromptField batch-process response"""
+    success: bool
+    message: str
+    total_processed: int
+    successful_count: int
+    error_count: int
+    promptfield_ids: List[str]
+    detailed_results: List[PromptFieldResult]
+    errors: Optional[List[PromptFieldLookupError]] = None
+
+class PromptFieldAndGeneratedPromptBatchResponse(BaseModel):
+    """Model for the PromptField search + GeneratedPrompt creation response; fields a branch doesn't report are omitted"""
+    success: bool
+    message: str
+    total_processed: Optional[int] = None
+    total_attributes: Optional[int] = None
+    found_promptfields: int
+    skipped_count: int
+    error_count: Optional[int] = None
+    generated_prompt_creation_successful: Optional[int] = None
+    generated_prompt_ids: List[str]
+    detailed_results: Optional[List[PromptFieldResult]] = None
+    skipped: List[PromptFieldSkipped]
+    creation_errors: Optional[List[Dict[str, Any]]] = None
+    errors: Optional[List[PromptFieldLookupError]] = None
+
+class BubbleRecordBatchGetResponse(BaseModel):
+    """Model for batch-get responses; records and missing_ids follow the order of the requested IDs"""
+    success: bool
+    message: str
+    data_type: str
+    environment: str
+    found_count: int
+    missing_count: int
+    error_count: int
+    records: List[Dict[str, Any]]
+    missing_ids: List[str]
+    errors: List[Dict[str, str]]
@@ -1,12 +1,19 @@
-from typing import Optional
-import requests
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
 import json
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from config import settings
 from dependencies import get_api_key
-from models import BubbleRecordCreate, BubbleRecordBatchCreate, BubbleRecordUpdateListField
+from models import BubbleRecordCreate, BubbleRecordBatchCreate, BubbleRecordUpdateListField, BubbleRecordUpdateListFieldBatch, BulkCreateResponse
+from services import json_codec
+from services.bubble_client import get_bubble_client, BubbleAPIError, http_exception_from_bubble_error
+from services.bulk import bulk_create_records
+from services.concurrency import prefetch
+from services.list_append import list_appender, ListFieldReadError
+from services.search_cache import sample_search_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,14 +30,31 @@ def get_bubble_base_url(environment: str = "version-test"):
     else:
         return f"https://{settings.BUBBLE_APP_DOMAIN}/api/1.1/obj/{settings.BUBBLE_SAMPLE_DATA_TYPE}"
 
+async def _stream_search_results(first_page: List[Dict[str, Any]], pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Write search results as NDJSON, one record per line, while later pages are fetched"""
+    try:
+        for record in first_page:
+            yield json_codec.dumps_line(record)
+        async for page in pages:
+            for record in page:
+                yield json_codec.dumps_line(record)
+    except (BubbleAPIError, httpx.HTTPError) as e:
+        # Headers are already sent, so report the failure as a final line
+        logger.error(f"Streaming search stopped early: {str(e)}")
+        yield json_codec.dumps_line({"error": f"Search stopped before all results were read: {str(e)}"})
+    finally:
+        await pages.aclose()
+
 @router.get("/search")
 async def search_bubble_sample_records_by_name(
     name: str, 
     bubble_environment: str = "version-test",
     limit: Optional[int] = 10,
+    stream: bool = False,
     api_key: str = Depends(get_api_key)
 ):
-    """Search for sample records in Bubble database by name field. Use query parameter: ?name=Sample Record&bubble_environment=version-test"""
+    """Search for sample records in Bubble database by name field. Use query parameter: ?name=Sample Record&bubble_environment=version-test
+    Add &stream=true to get every match (limit is ignored) as NDJSON, following Bubble's cursor page by page."""
     
     # Validate Bubble configuration
     base_url = get_bubble_base_url(bubble_environment)
@@ -40,67 +64,66 @@ async def search_bubble_sample_records_by_name(
             detail="Bubble API configuration is missing. Please check environment variables."
         )
     
-    # Prepare request with search constraints
-    url = base_url
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
+    # Build search constraints for Bubble Data API
+    constraints = [{
+        "key": "name",
+        "constraint_type": "equals",
+        "value": name
+    }]
     
-    # Build search parameters for Bubble Data API
-    params = {
-        "constraints": json.dumps([{
-            "key": "name",
-            "constraint_type": "equals",
-            "value": name
-        }]),
-        "limit": limit
-    }
+    if stream:
+        # Fetch one page ahead of what has been written, so memory stays bounded for any result size
+        pages = prefetch(get_bubble_client().iter_search_pages(
+            settings.BUBBLE_SAMPLE_DATA_TYPE, constraints, bubble_environment
+        ))
+        try:
+            first_page = await pages.__anext__()
+        except StopAsyncIteration:
+            first_page = []
+        except BubbleAPIError as e:
+            await pages.aclose()
+            if e.status_code == 400:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid search parameters: {e.text}"
+                )
+            raise http_exception_from_bubble_error(e)
+        except httpx.HTTPError as e:
+            await pages.aclose()
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to connect to Bubble API: {str(e)}"
+            )
+        
+        return StreamingResponse(_stream_search_results(first_page, pages), media_type="application/x-ndjson")
     
     try:
-        # Make request to Bubble API
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        # Served from the short-TTL search cache; identical concurrent searches share one Bubble call
+        page = await sample_search_cache.search(
+            settings.BUBBLE_SAMPLE_DATA_TYPE, constraints, bubble_environment, limit=limit
+        )
+        results = page.get("results", [])
         
-        logger.info(f"Search request URL: {response.url}")
-        logger.info(f"Response status: {response.status_code}")
+        return {
+            "success": True,
+            "search_query": {
+                "field": "name",
+                "value": name,
+                "limit": limit
+            },
+            "count": len(results),
+            "remaining": page.get("remaining", 0),
+            "results": results
+        }
         
-        if response.status_code == 200:
-            response_data = response.json()
-            results = response_data.get("response", {}).get("results", [])
-            
-            return {
-                "success": True,
-                "search_query": {
-                    "field": "name",
-                    "value": name,
-                    "limit": limit
-                },
-                "count": len(results),
-                "remaining": response_data.get("response", {}).get("remaining", 0),
-                "results": results
-            }
-        elif response.status_code == 400:
+    except BubbleAPIError as e:
+        if e.status_code == 400:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid search parameters: {response.text}"
-            )
-        elif response.status_code == 401:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Bubble API token"
-            )
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Permission denied. Check Bubble privacy rules and API settings."
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Bubble API error: {response.status_code} - {response.text}"
+                detail=f"Invalid search parameters: {e.text}"
             )
-            
-    except requests.exceptions.RequestException as e:
+        raise http_exception_from_bubble_error(e)
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to connect to Bubble API: {str(e)}"
@@ -122,16 +145,9 @@ async def get_bubble_sample_record(
             detail="Bubble API configuration is missing. Please check environment variables."
         )
     
-    # Prepare request
-    url = f"{base_url}/{record_id}"
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     try:
         # Make request to Bubble API
-        response = requests.get(url, headers=headers, timeout=30)
+        response = await get_bubble_client().get(settings.BUBBLE_SAMPLE_DATA_TYPE, record_id, bubble_environment)
         
         if response.status_code == 200:
             return {
@@ -150,7 +166,7 @@ async def get_bubble_sample_record(
                 detail=f"Bubble API error: {response.status_code} - {response.text}"
             )
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to connect to Bubble API: {str(e)}"
@@ -174,16 +190,12 @@ async def create_bubble_sample_record(record_data: BubbleRecordCreate, api_key:
         "description": record_data.description
     }
     
-    # Prepare request
-    url = base_url
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     try:
         # Make request to Bubble API
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = await get_bubble_client().create(
+            settings.BUBBLE_SAMPLE_DATA_TYPE, payload, record_data.bubble_environment
+        )
+        sample_search_cache.invalidate(settings.BUBBLE_SAMPLE_DATA_TYPE, record_data.bubble_environment)
         
         if response.status_code == 201:
             response_data = response.json()
@@ -214,13 +226,13 @@ async def create_bubble_sample_record(record_data: BubbleRecordCreate, api_key:
                 detail=f"Bubble API error: {response.status_code} - {response.text}"
             )
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to connect to Bubble API: {str(e)}"
         )
 
-@router.post("/batch")
+@router.post("/batch", response_model=BulkCreateResponse)
 async def create_bubble_sample_records_batch(batch_data: BubbleRecordBatchCreate, api_key: str = Depends(get_api_key)):
     """Create multiple sample records in Bubble database using bulk API"""
     
@@ -232,122 +244,48 @@ async def create_bubble_sample_records_batch(batch_data: BubbleRecordBatchCreate
             detail="Bubble API configuration is missing. Please check environment variables."
         )
     
-    # Format data as newline-separated JSON objects
-    bulk_data_lines = []
-    for record in batch_data.records:
-        record_json = {
+    # Records are streamed to Bubble as NDJSON in chunks
+    bulk_records = (
+        {
             "name": record.name,
             "description": record.description
         }
-        bulk_data_lines.append(json.dumps(record_json))
-    
-    bulk_data = "\n".join(bulk_data_lines)
+        for record in batch_data.records
+    )
     
-    # Debug logging
     logger.info(f"Batch request data count: {len(batch_data.records)}")
-    logger.info(f"Bulk data lines: {bulk_data_lines}")
-    logger.info(f"Final bulk data: {repr(bulk_data)}")
-    
-    # Prepare request to bulk endpoint
-    url = f"{base_url}/bulk"
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "text/plain"
-    }
-    
-    logger.info(f"Making request to: {url}")
-    logger.info(f"Request headers: {headers}")
     
     try:
-        # Make request to Bubble API
-        response = requests.post(url, headers=headers, data=bulk_data, timeout=30)
+        # Upload through the chunked bulk engine
+        try:
+            bulk_result = await bulk_create_records(
+                settings.BUBBLE_SAMPLE_DATA_TYPE, bulk_records, batch_data.bubble_environment
+            )
+        finally:
+            # Even a partly failed upload may have created records
+            sample_search_cache.invalidate(settings.BUBBLE_SAMPLE_DATA_TYPE, batch_data.bubble_environment)
         
-        # Debug response
-        logger.info(f"Response status code: {response.status_code}")
-        logger.info(f"Response headers: {dict(response.headers)}")
-        logger.info(f"Response content: {repr(response.content)}")
-        logger.info(f"Response text: {repr(response.text)}")
+        successful_count = bulk_result.successful_count
         
-        if response.status_code == 200:
-            try:
-                # Parse multi-line JSON response (one JSON object per line)
-                response_lines = response.text.strip().split('\n')
-                parsed_responses = []
-                
-                for line in response_lines:
-                    if line.strip():  # Skip empty lines
-                        parsed_responses.append(json.loads(line))
-                
-                logger.info(f"Successfully parsed {len(parsed_responses)} JSON responses: {parsed_responses}")
-                
-                # Extract created record IDs
-                created_ids = []
-                successful_count = 0
-                errors = []
-                
-                for resp in parsed_responses:
-                    if resp.get("status") == "success":
-                        successful_count += 1
-                        if "id" in resp:
-                            created_ids.append(resp["id"])
-                    else:
-                        errors.append(resp)
-                
-                return {
-                    "success": True,
-                    "message": f"Batch created {successful_count} out of {len(batch_data.records)} records successfully",
-                    "requested_count": len(batch_data.records),
-                    "successful_count": successful_count,
-                    "created_ids": created_ids,
-                    "errors": errors,
-                    "detailed_responses": parsed_responses
-                }
-                
-            except json.JSONDecodeError as json_err:
-                logger.error(f"JSON decode error: {json_err}")
-                logger.error(f"Raw response: {response.text}")
-                return {
-                    "success": False,
-                    "message": f"Batch request completed but response parsing failed",
-                    "requested_count": len(batch_data.records),
-                    "raw_response": response.text,
-                    "error": str(json_err)
-                }
-        elif response.status_code == 400:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid data provided: {response.text}"
-            )
-        elif response.status_code == 401:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Bubble API token"
-            )
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Permission denied. Check Bubble privacy rules and API settings."
-            )
-        else:
-            logger.error(f"Unexpected status code: {response.status_code}")
-            logger.error(f"Response text: {response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Bubble API error: {response.status_code} - {response.text}"
-            )
+        return {
+            "success": True,
+            "message": f"Batch created {successful_count} out of {len(batch_data.records)} records successfully",
+            "requested_count": len(batch_data.records),
+            "successful_count": successful_count,
+            "created_ids": bulk_result.created_ids,
+            "errors": bulk_result.errors,
+            "detailed_responses": bulk_result.responses
+        }
             
-    except requests.exceptions.RequestException as e:
+    except BubbleAPIError as e:
+        logger.error(f"Unexpected status code: {e.status_code}")
+        raise http_exception_from_bubble_error(e)
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to connect to Bubble API: {str(e)}"
         )
-    except json.JSONDecodeError as json_err:
-        logger.error(f"JSON decode error in exception handler: {json_err}")
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Failed to parse Bubble API response: {str(json_err)}"
-        )
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         raise HTTPException(
@@ -355,16 +293,34 @@ async def create_bubble_sample_records_batch(batch_data: BubbleRecordBatchCreate
             detail=f"Unexpected error: {str(e)}"
         )
 
-@router.patch("/{record_id}/add-sample2")
-async def add_sample2_to_record_list(
-    record_id: str, 
-    update_data: BubbleRecordUpdateListField, 
-    api_key: str = Depends(get_api_key)
-):
-    """Add a Sample2 record to the list_of_sample2 field of a Sample record. Use 1755917228572x874974032002943500 and 1755919121078x981069894958858800"""
-    
+def _list_update_http_exception(error: BubbleAPIError, record_id: str) -> HTTPException:
+    """Map a failed Sample list update to the HTTPException the add-sample2 endpoints return"""
+    if isinstance(error, ListFieldReadError):
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Could not fetch record {record_id}: {error.text}"
+        )
+    if error.status_code == 400:
+        # Log the full error response for debugging
+        logger.error(f"400 Bad Request details: {error.text}")
+        try:
+            error_message = json.loads(error.text).get("body", {}).get("message", error.text)
+        except (ValueError, AttributeError):
+            error_message = error.text
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid data provided: {error_message}"
+        )
+    if error.status_code == 404:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sample record with ID {record_id} not found"
+        )
+    return http_exception_from_bubble_error(error)
+
+def _require_sample2_config(environment: str):
     # Validate Bubble configuration
-    base_url = get_bubble_base_url(update_data.bubble_environment)
+    base_url = get_bubble_base_url(environment)
     if not base_url or not settings.BUBBLE_API_TOKEN:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -376,135 +332,96 @@ async def add_sample2_to_record_list(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="BUBBLE_SAMPLE2_DATA_TYPE is not configured. Please check environment variables."
         )
-    
-    # Try different payload formats for Bubble list field updates
-    # Format 1: Direct assignment with existing values plus new one
-    # First, get the current record to see existing list values
-    url = f"{base_url}/{record_id}"
-    headers = {
-        "Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    logger.info(f"First, fetching current record {record_id} to get existing list values")
-    
+
+async def _append_sample2_ids(record_id: str, sample2_ids: List[str], environment: str) -> Dict[str, Any]:
+    """Append through the shared per-record writer, so concurrent calls merge into one GET + PATCH"""
     try:
-        # Get current record
-        get_response = requests.get(url, headers=headers, timeout=30)
-        
-        if get_response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Could not fetch record {record_id}: {get_response.text}"
-            )
-        
-        current_data = get_response.json()
-        logger.info(f"Current record data: {current_data}")
-        
-        # Get existing list values
-        current_list = current_data.get("response", {}).get("list_of_sample2", [])
-        logger.info(f"Current list_of_sample2: {current_list}")
-        
-        # Add new ID to existing list (avoid duplicates)
-        if isinstance(current_list, list):
-            updated_list = current_list.copy()
-            if update_data.sample2_id not in updated_list:
-                updated_list.append(update_data.sample2_id)
-            else:
-                # Item already exists, return success without making update
-                return {
-                    "success": True,
-                    "message": f"Sample2 record {update_data.sample2_id} already exists in Sample record {record_id}",
-                    "record_id": record_id,
-                    "sample2_id": update_data.sample2_id,
-                    "previous_list": current_list,
-                    "updated_list": current_list,
-                    "already_existed": True
-                }
-        else:
-            updated_list = [update_data.sample2_id]
-        
-        # Prepare the update payload with the complete updated list
-        payload = {
-            "list_of_sample2": updated_list
-        }
-        
-        logger.info(f"Updating record {record_id} with payload: {payload}")
-        logger.info(f"Request URL: {url}")
-        
-        # Make PATCH request to Bubble API
-        response = requests.patch(url, headers=headers, json=payload, timeout=30)
-        
-        logger.info(f"Response status: {response.status_code}")
-        logger.info(f"Response content: {response.text}")
-        
-        # Handle both 200 (OK with content) and 204 (No Content - successful update)
-        if response.status_code in [200, 204]:
-            # For 204, there's no response body, so we create our own success response
-            if response.status_code == 204:
-                response_data = {
-                    "status": "success",
-                    "message": "Record updated successfully"
-                }
-            else:
-                response_data = response.json()
-            
-            return {
-                "success": True,
-                "message": f"Successfully added Sample2 record {update_data.sample2_id} to Sample record {record_id}",
-                "record_id": record_id,
-                "added_sample2_id": update_data.sample2_id,
-                "previous_list": current_list,
-                "updated_list": updated_list,
-                "http_status": response.status_code,
-                "data": response_data
-            }
-        elif response.status_code == 400:
-            # Log the full error response for debugging
-            logger.error(f"400 Bad Request details: {response.text}")
-            try:
-                error_data = response.json()
-                error_message = error_data.get("body", {}).get("message", response.text)
-            except:
-                error_message = response.text
-            
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid data provided: {error_message}"
-            )
-        elif response.status_code == 401:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Bubble API token"
-            )
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Permission denied. Check Bubble privacy rules and API settings."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sample record with ID {record_id} not found"
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Bubble API error: {response.status_code} - {response.text}"
-            )
-            
-    except requests.exceptions.RequestException as e:
+        result = await list_appender.append(
+            settings.BUBBLE_SAMPLE_DATA_TYPE, record_id, "list_of_sample2", sample2_ids, environment
+        )
+    except BubbleAPIError as e:
+        raise _list_update_http_exception(e, record_id)
+    except httpx.HTTPError as e:
         logger.error(f"Request exception: {e}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to connect to Bubble API: {str(e)}"
         )
-    except HTTPException:
-        # Re-raise HTTP exceptions as-is
-        raise
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(e)}"
         )
+    
+    if result["http_status"] is not None:
+        sample_search_cache.invalidate(settings.BUBBLE_SAMPLE_DATA_TYPE, environment)
+    return result
+
+@router.patch("/{record_id}/add-sample2")
+async def add_sample2_to_record_list(
+    record_id: str, 
+    update_data: BubbleRecordUpdateListField, 
+    api_key: str = Depends(get_api_key)
+):
+    """Add a Sample2 record to the list_of_sample2 field of a Sample record. Use 1755917228572x874974032002943500 and 1755919121078x981069894958858800"""
+    
+    _require_sample2_config(update_data.bubble_environment)
+    
+    result = await _append_sample2_ids(record_id, [update_data.sample2_id], update_data.bubble_environment)
+    
+    if not result["added"]:
+        # Item already exists, return success without making update
+        return {
+            "success": True,
+            "message": f"Sample2 record {update_data.sample2_id} already exists in Sample record {record_id}",
+            "record_id": record_id,
+            "sample2_id": update_data.sample2_id,
+            "previous_list": result["previous_list"],
+            "updated_list": result["updated_list"],
+            "already_existed": True
+        }
+    
+    return {
+        "success": True,
+        "message": f"Successfully added Sample2 record {update_data.sample2_id} to Sample record {record_id}",
+        "record_id": record_id,
+        "added_sample2_id": update_data.sample2_id,
+        "previous_list": result["previous_list"],
+        "updated_list": result["updated_list"],
+        "http_status": result["http_status"],
+        "data": {
+            "status": "success",
+            "message": "Record updated successfully"
+        }
+    }
+
+@router.patch("/{record_id}/add-sample2/batch")
+async def add_sample2_batch_to_record_list(
+    record_id: str, 
+    update_data: BubbleRecordUpdateListFieldBatch, 
+    api_key: str = Depends(get_api_key)
+):
+    """Add many Sample2 records to the list_of_sample2 field of a Sample record with a single GET + PATCH.
+    Concurrent calls for the same record are merged into one update instead of overwriting each other."""
+    
+    _require_sample2_config(update_data.bubble_environment)
+    
+    if not update_data.sample2_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sample2_ids must contain at least one ID"
+        )
+    
+    result = await _append_sample2_ids(record_id, update_data.sample2_ids, update_data.bubble_environment)
+    
+    return {
+        "success": True,
+        "message": f"Added {len(result['added'])} of {len(update_data.sample2_ids)} Sample2 records to Sample record {record_id}",
+        "record_id": record_id,
+        "added_sample2_ids": result["added"],
+        "already_existed_ids": result["already_present"],
+        "previous_list": result["previous_list"],
+        "updated_list": result["updated_list"],
+        "http_status": result["http_status"]
+    }
@@ -0,0 +1,277 @@
+from typing import Optional, Dict, Any, List, AsyncIterator, Union
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+from fastapi import HTTPException, status
+
+from config import settings
+from services import json_codec
+from services.metrics import bubble_request_duration, bubble_request_retries, bubble_requests_in_flight
+from services.rate_limit import acquire_rate_limit
+from services.resilience import RETRYABLE_STATUS_CODES, backoff_delay, get_circuit_breaker, parse_retry_after
+from services.timing import record_upstream_call
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def get_bubble_data_url(data_type: str, environment: str = "version-test") -> Optional[str]:
+    """Get the Data API base URL for a Bubble data type based on environment"""
+    if not settings.BUBBLE_APP_DOMAIN or not data_type:
+        return None
+
+    if environment == "version-test":
+        return f"https://{settings.BUBBLE_APP_DOMAIN}/version-test/api/1.1/obj/{data_type}"
+    else:
+        return f"https://{settings.BUBBLE_APP_DOMAIN}/api/1.1/obj/{data_type}"
+
+# Bubble caps a single search page at 100 results
+BUBBLE_MAX_PAGE_SIZE = 100
+
+# Operations that can be repeated without side effects beyond the first success
+IDEMPOTENT_OPERATIONS = {"search", "get", "patch"}
+
+class BubbleAPIError(Exception):
+    """Raised when Bubble answers with an unexpected HTTP status"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        super().__init__(f"Bubble API error: {status_code} - {text}")
+
+def http_exception_from_bubble_error(error: BubbleAPIError) -> HTTPException:
+    """Map an unexpected Bubble status to the HTTPException our endpoints return for it"""
+    if error.status_code == 400:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid data provided: {error.text}"
+        )
+    elif error.status_code == 401:
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Bubble API token"
+        )
+    elif error.status_code == 403:
+        return HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied. Check Bubble privacy rules and API settings."
+        )
+    else:
+        return HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Bubble API error: {error.status_code} - {error.text}"
+        )
+
+class BubbleClient:
+    """Shared async client for the Bubble Data API.
+
+    Wraps a single pooled httpx.AsyncClient so keep-alive connections are reused
+    across requests, and builds the auth headers once instead of per call.
+    Every call goes through `_send`, which takes the data type, operation and
+    environment so cross-cutting behaviour can be added in one place.
+    """
+
+    def __init__(self):
+        self._client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {settings.BUBBLE_API_TOKEN}"},
+            timeout=httpx.Timeout(settings.BUBBLE_HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.BUBBLE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.BUBBLE_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _url(self, data_type: str, environment: str, record_id: Optional[str] = None) -> str:
+        base_url = get_bubble_data_url(data_type, environment)
+        if not base_url:
+            raise ValueError(f"Bubble API configuration is missing for data type '{data_type}'")
+        return f"{base_url}/{record_id}" if record_id else base_url
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        operation: str,
+        data_type: str,
+        environment: str,
+        stream: bool = False,
+        **kwargs
+    ) -> httpx.Response:
+        """Send a request to Bubble. Raises httpx.HTTPError on transport failures.
+
+        Idempotent operations are retried on 429/5xx and transport errors with exponential
+        backoff and jitter, honoring Retry-After; creates and bulk writes are sent once.
+        Each call is checked against the environment's circuit breaker first, which raises
+        CircuitOpenError instead of queueing for Bubble while it is open; every attempt then
+        waits for an outbound rate-limit token (RateLimitTimeout past the max wait). Both errors
+        are httpx.TransportErrors. The breaker sees one outcome per call, after retries: a
+        final 5xx or transport error is a failure, a final 429 is backpressure and counts as neither.
+        With `stream=True` the body is left unread; the caller must `aclose()` the response.
+        """
+        breaker = get_circuit_breaker(environment)
+        breaker.before_call()
+        outcome_recorded = False
+        max_attempts = max(1, settings.BUBBLE_RETRY_MAX_ATTEMPTS) if operation in IDEMPOTENT_OPERATIONS else 1
+        attempt = 1
+        try:
+            while True:
+                await acquire_rate_limit(environment, operation)
+                request = self._client.build_request(method, url, **kwargs)
+                bubble_requests_in_flight.inc((operation, environment))
+                started = time.perf_counter()
+                try:
+                    response = await self._client.send(request, stream=stream)
+                    status_label = str(response.status_code)
+                except httpx.TransportError as e:
+                    status_label = type(e).__name__
+                    if attempt >= max_attempts:
+                        breaker.record_failure()
+                        outcome_recorded = True
+                        raise
+                    delay = backoff_delay(attempt)
+                    logger.warning(f"Bubble {operation} on {data_type} failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                except BaseException as e:
+                    status_label = type(e).__name__
+                    raise
+                else:
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        breaker.record_success()
+                        outcome_recorded = True
+                        return response
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if attempt >= max_attempts or (retry_after is not None and retry_after > settings.BUBBLE_RETRY_BACKOFF_MAX):
+                        if response.status_code != 429:
+                            breaker.record_failure()
+                            outcome_recorded = True
+                        return response
+                    if stream:
+                        await response.aclose()
+                    delay = backoff_delay(attempt, retry_after)
+                    logger.warning(f"Bubble {operation} on {data_type} returned {response.status_code}, retry {attempt} in {delay:.2f}s")
+                finally:
+                    elapsed = time.perf_counter() - started
+                    bubble_requests_in_flight.dec((operation, environment))
+                    bubble_request_duration.observe((data_type, operation, environment, status_label), elapsed)
+                    record_upstream_call(operation, data_type, status_label, started, elapsed)
+                bubble_request_retries.inc((data_type, operation, environment))
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            # Cancelled, rate-limited out or ended on a 429: release a half-open trial slot without an outcome
+            if not outcome_recorded:
+                breaker.abandon_call()
+
+    async def search(
+        self,
+        data_type: str,
+        constraints: List[Dict[str, Any]],
+        environment: str = "version-test",
+        limit: Optional[int] = None,
+        cursor: Optional[int] = None
+    ) -> httpx.Response:
+        """Search records of a data type with a list of Bubble constraints"""
+        params = {"constraints": json.dumps(constraints)}
+        if limit is not None:
+            params["limit"] = limit
+        if cursor is not None:
+            params["cursor"] = cursor
+        return await self._send(
+            "GET", self._url(data_type, environment), "search", data_type, environment,
+            params=params
+        )
+
+    async def iter_search_pages(
+        self,
+        data_type: str,
+        constraints: List[Dict[str, Any]],
+        environment: str = "version-test",
+        page_size: int = BUBBLE_MAX_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Walk Bubble's cursor and yield each page of search results until none remain"""
+        cursor = 0
+        while True:
+            response = await self.search(data_type, constraints, environment, limit=page_size, cursor=cursor)
+            if response.status_code != 200:
+                raise BubbleAPIError(response.status_code, response.text)
+
+            page = json_codec.loads(response.content).get("response", {})
+            results = page.get("results", [])
+            yield results
+
+            if not results or page.get("remaining", 0) <= 0:
+                break
+            cursor += len(results)
+
+    async def get(self, data_type: str, record_id: str, environment: str = "version-test") -> httpx.Response:
+        """Fetch a single record by ID"""
+        return await self._send(
+            "GET", self._url(data_type, environment, record_id), "get", data_type, environment
+        )
+
+    async def create(self, data_type: str, payload: Dict[str, Any], environment: str = "version-test") -> httpx.Response:
+        """Create a single record"""
+        return await self._send(
+            "POST", self._url(data_type, environment), "create", data_type, environment,
+            json=payload
+        )
+
+    async def bulk_create(
+        self,
+        data_type: str,
+        body: Union[str, bytes, AsyncIterator[bytes]],
+        environment: str = "version-test",
+        stream: bool = False
+    ) -> httpx.Response:
+        """Create many records via the /bulk endpoint. `body` is newline-separated JSON, optionally streamed.
+
+        Pass `stream=True` to read the per-line reply incrementally; the caller must then close the response.
+        """
+        return await self._send(
+            "POST", f"{self._url(data_type, environment)}/bulk", "bulk", data_type, environment,
+            stream=stream,
+            content=body,
+            headers={"Content-Type": "text/plain"},
+            timeout=settings.BUBBLE_BULK_TIMEOUT
+        )
+
+    async def patch(
+        self,
+        data_type: str,
+        record_id: str,
+        payload: Dict[str, Any],
+        environment: str = "version-test"
+    ) -> httpx.Response:
+        """Modify fields of a single record"""
+        return await self._send(
+            "PATCH", self._url(data_type, environment, record_id), "patch", data_type, environment,
+            json=payload
+        )
+
+# Single shared instance, created and closed with the app lifespan
+_bubble_client: Optional[BubbleClient] = None
+
+async def start_bubble_client() -> BubbleClient:
+    global _bubble_client
+    if _bubble_client is None:
+        _bubble_client = BubbleClient()
+        logger.info("Bubble API client started")
+    return _bubble_client
+
+async def close_bubble_client():
+    global _bubble_client
+    if _bubble_client is not None:
+        await _bubble_client.aclose()
+        _bubble_client = None
+        logger.info("Bubble API client closed")
+
+def get_bubble_client() -> BubbleClient:
+    """Return the shared Bubble client, creating it lazily if the lifespan hasn't run"""
+    global _bubble_client
+    if _bubble_client is None:
+        _bubble_client = BubbleClient()
+    return _bubble_client
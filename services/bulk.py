@@ -0,0 +1,143 @@
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from itertools import islice
+import asyncio
+import logging
+
+import httpx
+
+from config import settings
+from services import json_codec
+from services.bubble_client import get_bubble_client, BubbleAPIError
+from services.metrics import bubble_bulk_records
+from services.ndjson import BulkResponseTally, iter_ndjson
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class BulkUploadResult(BulkResponseTally):
+    """Per-record outcome of a chunked bulk upload, in the order the records were given"""
+
+    @property
+    def requested_count(self) -> int:
+        return len(self.responses)
+
+def _chunks(records: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+async def _ndjson_body(records: List[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Stream records as newline-separated JSON without building the whole body in memory"""
+    for i, record in enumerate(records):
+        line = json_codec.dumps(record)
+        yield line if i == 0 else b"\n" + line
+
+def _error_response(message: str, http_status: Optional[int] = None) -> Dict[str, Any]:
+    error = {"status": "error", "message": message}
+    if http_status is not None:
+        error["http_status"] = http_status
+    return error
+
+def _chunk_error(size: int, message: str, http_status: Optional[int] = None) -> BulkResponseTally:
+    tally = BulkResponseTally()
+    for _ in range(size):
+        tally.add(_error_response(message, http_status))
+    return tally
+
+async def _upload_chunk(data_type: str, records: List[Dict[str, Any]], environment: str) -> BulkResponseTally:
+    """Upload one chunk and tally exactly one response per record.
+
+    The reply is decoded line by line off the byte stream; a malformed line becomes an
+    error at its index. Raises BubbleAPIError / httpx.HTTPError so the caller can tell a
+    failed chunk from per-line failures inside a successful one.
+    """
+    response = await get_bubble_client().bulk_create(data_type, _ndjson_body(records), environment, stream=True)
+    try:
+        if response.status_code != 200:
+            await response.aread()
+            raise BubbleAPIError(response.status_code, response.text)
+
+        tally = BulkResponseTally()
+        async for index, resp in iter_ndjson(response.aiter_bytes()):
+            if index >= len(records):
+                logger.warning(f"Ignoring extra line {index} in {data_type} bulk response")
+                continue
+            if isinstance(resp, ValueError):
+                tally.add(_error_response(f"Failed to parse Bubble bulk response line: {str(resp)}"))
+            elif not isinstance(resp, dict):
+                tally.add(_error_response(f"Unexpected Bubble bulk response line: {resp!r}"))
+            else:
+                tally.add(resp)
+    finally:
+        await response.aclose()
+
+    missing = len(records) - len(tally.responses)
+    if missing > 0:
+        tally.extend(_chunk_error(missing, "Bubble bulk response has no line for this record"))
+    return tally
+
+async def bulk_create_records(
+    data_type: str,
+    records: Iterable[Dict[str, Any]],
+    environment: str = "version-test",
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> BulkUploadResult:
+    """Create any number of records through Bubble's /bulk endpoint.
+
+    Records are consumed lazily, split into chunks of `chunk_size` (Bubble caps the
+    records per bulk call) and up to `concurrency` chunks are uploaded at once.
+    Per-line results are merged back so index i always describes records[i].
+    A failed chunk becomes per-record errors; if every chunk fails, the first
+    failure is raised so callers can map it to an HTTP status. If the upload is
+    cancelled or fails unexpectedly, chunks still in flight are cancelled with it.
+    """
+    chunk_size = chunk_size or settings.BUBBLE_BULK_CHUNK_SIZE
+    semaphore = asyncio.Semaphore(concurrency or settings.BUBBLE_BULK_CONCURRENCY)
+    chunk_results: List[BulkResponseTally] = []
+    chunk_failures: List[Exception] = []
+
+    async def run(position: int, chunk: List[Dict[str, Any]]):
+        try:
+            chunk_results[position] = await _upload_chunk(data_type, chunk, environment)
+        except BubbleAPIError as e:
+            logger.error(f"Bulk chunk {position} for {data_type} failed: {e.status_code}")
+            chunk_failures.append(e)
+            chunk_results[position] = _chunk_error(len(chunk), str(e), e.status_code)
+        except httpx.HTTPError as e:
+            logger.error(f"Bulk chunk {position} for {data_type} failed: {str(e)}")
+            chunk_failures.append(e)
+            chunk_results[position] = _chunk_error(len(chunk), f"Failed to connect to Bubble API: {str(e)}")
+        finally:
+            semaphore.release()
+
+    tasks = []
+    try:
+        for position, chunk in enumerate(_chunks(records, chunk_size)):
+            # Only pull the next chunk off the iterator once an upload slot is free
+            await semaphore.acquire()
+            chunk_results.append(BulkResponseTally())
+            tasks.append(asyncio.ensure_future(run(position, chunk)))
+
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Cancelled, or the records iterator / a chunk raised unexpectedly: stop the other uploads too
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    if tasks and len(chunk_failures) == len(tasks):
+        raise chunk_failures[0]
+
+    result = BulkUploadResult()
+    for chunk_tally in chunk_results:
+        result.extend(chunk_tally)
+
+    bubble_bulk_records.inc((data_type, environment, "success"), result.successful_count)
+    bubble_bulk_records.inc((data_type, environment, "error"), result.requested_count - result.successful_count)
+    logger.info(f"Bulk created {result.successful_count} of {result.requested_count} {data_type} records in {len(tasks)} chunk(s)")
+    return result
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import time
+
+# Sentinel returned by TTLCache.get when a key is absent or expired
+MISSING = object()
+
+class TTLCache:
+    """Size-bounded in-memory cache with per-entry TTL and LRU eviction.
+
+    Negative entries (a cached "not found") are stored as None with their own,
+    usually shorter, TTL. Hit/miss/eviction counters are kept for sizing.
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Return the cached value (None for a negative entry) or `default` on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_negative(self, key: Hashable):
+        """Remember that `key` does not exist upstream, for the negative TTL"""
+        self.set(key, None, self.negative_ttl_seconds)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def values(self) -> List[Any]:
+        """Snapshot of unexpired values, without touching hit/miss counters"""
+        now = time.monotonic()
+        return [value for value, expires_at in self._entries.values() if expires_at > now]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,148 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, List, TypeVar
+import asyncio
+
+from config import settings
+
+T = TypeVar("T")
+
+# One semaphore per Bubble environment, shared by every request in the process
+_environment_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def get_environment_semaphore(environment: str) -> asyncio.Semaphore:
+    """Return the semaphore bounding concurrent per-item Bubble calls for an environment"""
+    semaphore = _environment_semaphores.get(environment)
+    if semaphore is None:
+        limit = settings.BUBBLE_LOOKUP_CONCURRENCY.get(environment, settings.BUBBLE_LOOKUP_CONCURRENCY_DEFAULT)
+        semaphore = asyncio.Semaphore(max(1, limit))
+        _environment_semaphores[environment] = semaphore
+    return semaphore
+
+async def map_with_environment_limit(
+    environment: str,
+    func: Callable[[T], Awaitable[Any]],
+    items: Iterable[T]
+) -> List[Any]:
+    """Run `func` over `items` concurrently, bounded by the environment's limit.
+
+    Results come back in input order. A call that raises yields its exception in
+    that position instead of cancelling the others.
+    """
+    semaphore = get_environment_semaphore(environment)
+
+    async def run(item: T):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
+async def prefetch(source: AsyncIterator[T], depth: int = 1) -> AsyncIterator[T]:
+    """Iterate `source` in a background task, keeping up to `depth` items ready ahead of the consumer.
+
+    Lets the next page of a paged fetch load while the current one is being written out,
+    without ever buffering more than a bounded number of items. Errors from `source` are
+    re-raised to the consumer at the position they occurred.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    end = object()
+
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put((item, None))
+            await queue.put((end, None))
+        except Exception as e:
+            await queue.put((end, e))
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work as a task; callers arriving while it
+    is pending await the same task and get the same result or exception. The task
+    is shielded, so a cancelled caller doesn't cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def do_batch(
+        self,
+        keys: List[Hashable],
+        func: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+    ) -> Dict[Hashable, Any]:
+        """Batched variant of `do`: keys already in flight are joined, the rest run in one call.
+
+        `func` receives the keys nobody else is working on and returns a mapping of
+        key -> result, where a result may be an exception instance for a per-key failure.
+        Returns key -> result (or exception) for every requested key.
+        """
+        pending: Dict[Hashable, asyncio.Future] = {}
+        leader_keys = []
+        for key in dict.fromkeys(keys):
+            task = self._inflight.get(key)
+            if task is None:
+                leader_keys.append(key)
+            else:
+                self.coalesced += 1
+                pending[key] = task
+
+        if leader_keys:
+            self.calls += 1
+            batch = asyncio.ensure_future(func(leader_keys))
+            for key in leader_keys:
+                task = asyncio.ensure_future(self._pick(batch, key))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done, key=key: self._forget(key, done))
+                pending[key] = task
+
+        results = await asyncio.gather(*(asyncio.shield(task) for task in pending.values()), return_exceptions=True)
+        return dict(zip(pending.keys(), results))
+
+    @staticmethod
+    async def _pick(batch: asyncio.Future, key: Hashable) -> Any:
+        results = await batch
+        if key not in results:
+            raise RuntimeError(f"Batched call returned no result for {key!r}")
+        result = results[key]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,167 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from config import settings
+from services.cache import TTLCache, MISSING
+from services.timing import record_phase
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    """A unit of background work with per-step progress.
+
+    Pipelines report progress through `start_step` / `complete_step` / `fail_step`;
+    the same object can be used without a queue when a pipeline runs inline. Finished
+    steps carry their duration, which is also reported as a phase of the current request.
+    """
+
+    def __init__(self, kind: str, steps: Optional[List[str]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.steps: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in (steps or [])}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._step_started: Dict[str, float] = {}
+
+    def start_step(self, name: str):
+        self.steps[name] = {"status": "running", "started_at": _now()}
+        self._step_started[name] = time.perf_counter()
+
+    def _finish_step(self, name: str, status: str, detail: Dict[str, Any]):
+        step = self.steps.setdefault(name, {})
+        step.update(detail)
+        step["status"] = status
+        step["finished_at"] = _now()
+        started = self._step_started.pop(name, None)
+        if started is not None:
+            duration = time.perf_counter() - started
+            step["duration_ms"] = round(duration * 1000, 1)
+            record_phase(name, duration)
+
+    def complete_step(self, name: str, **detail):
+        self._finish_step(name, "completed", detail)
+
+    def fail_step(self, name: str, **detail):
+        self._finish_step(name, "failed", detail)
+
+    def skip_step(self, name: str, reason: str):
+        self.steps[name] = {"status": "skipped", "reason": reason}
+
+    def fail_running_steps(self, error: str):
+        """Mark steps interrupted by an exception as failed"""
+        for name, step in self.steps.items():
+            if step.get("status") == "running":
+                self.fail_step(name, error=error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": self.steps,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobQueue:
+    """Bounded in-process job queue drained by a fixed pool of worker tasks.
+
+    Finished jobs are kept for a while so their status can be polled.
+    """
+
+    def __init__(self, worker_count: int, max_queue_size: int):
+        self.worker_count = worker_count
+        self.max_queue_size = max_queue_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._jobs = TTLCache(
+            max_entries=settings.JOB_RESULT_MAX_ENTRIES,
+            ttl_seconds=settings.JOB_RESULT_TTL_SECONDS
+        )
+        self.running = 0
+
+    async def start(self):
+        if self._workers:
+            return
+        self._workers = [asyncio.ensure_future(self._worker(n)) for n in range(self.worker_count)]
+        logger.info(f"Started {self.worker_count} job workers (queue size {self.max_queue_size})")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if not self._queue.empty():
+            logger.warning(f"Stopping job workers with {self._queue.qsize()} job(s) still queued")
+
+    def submit(self, kind: str, func: Callable[[Job], Awaitable[Dict[str, Any]]], steps: Optional[List[str]] = None) -> Job:
+        """Queue `func(job)` to run on a worker and return the job immediately"""
+        job = Job(kind, steps)
+        try:
+            self._queue.put_nowait((job, func))
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Job queue is full ({self.max_queue_size} jobs waiting)")
+        self._jobs.set(job.id, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return None if job is MISSING else job
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "tracked_jobs": len(self._jobs)
+        }
+
+    async def _worker(self, number: int):
+        while True:
+            job, func = await self._queue.get()
+            self.running += 1
+            job.status = "running"
+            job.started_at = _now()
+            try:
+                job.result = await func(job)
+                job.status = "completed" if job.result.get("success", True) else "failed"
+            except HTTPException as e:
+                job.status = "failed"
+                job.error = {"status_code": e.status_code, "detail": e.detail}
+                job.fail_running_steps(str(e.detail))
+            except Exception as e:
+                logger.error(f"Job {job.id} ({job.kind}) failed on worker {number}: {str(e)}")
+                job.status = "failed"
+                job.error = {"status_code": 500, "detail": f"Unexpected error: {str(e)}"}
+                job.fail_running_steps(str(e))
+            finally:
+                job.finished_at = _now()
+                self.running -= 1
+                self._queue.task_done()
+
+# Shared queue for background pipelines, started and stopped with the app lifespan
+job_queue = JobQueue(
+    worker_count=settings.JOB_WORKER_COUNT,
+    max_queue_size=settings.JOB_QUEUE_MAX_SIZE
+)
@@ -0,0 +1,152 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request body, so a retry only resumes if it sends the same input"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+class StepJournal:
+    """Durable per-request step journal stored in SQLite on local disk.
+
+    Each (environment, request_id) row holds the JSON state of a multi-step pipeline,
+    so a retried request can resume from the first incomplete step instead of redoing
+    writes that already reached Bubble. SQLite calls run in a worker thread.
+    """
+
+    def __init__(self, path: str, retention_seconds: float, enabled: bool = True):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.enabled = enabled
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Per-request run locks and how many runs hold or wait for each, so idle ones can be dropped
+        self._run_locks: Dict[Tuple[str, str], Tuple[asyncio.Lock, int]] = {}
+
+    def _open(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS step_journal (
+                    environment TEXT NOT NULL,
+                    request_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (environment, request_id)
+                )
+                """
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            connection = self._open()
+            rows = connection.execute(sql, params).fetchall()
+            connection.commit()
+            return rows
+
+    @asynccontextmanager
+    async def run_lock(self, environment: str, request_id: str) -> AsyncIterator[None]:
+        """Serialize runs for one request in this process.
+
+        A retry that overlaps a run still in progress waits for it and then loads the journal
+        it left, instead of both starting from an empty journal and writing twice.
+        """
+        key = (environment, request_id)
+        lock, users = self._run_locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._run_locks[key] = (lock, users + 1)
+        try:
+            if lock.locked():
+                logger.info(f"Request {request_id} is already being processed, waiting for that run to finish")
+            async with lock:
+                yield
+        finally:
+            lock, users = self._run_locks[key]
+            if users > 1:
+                self._run_locks[key] = (lock, users - 1)
+            else:
+                del self._run_locks[key]
+
+    async def open(self):
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self._open)
+        removed = await self.purge_expired()
+        logger.info(f"Step journal opened at {self.path} ({removed} expired entries purged)")
+
+    async def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def load(self, environment: str, request_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the journaled state for a request, or None if absent, expired or for different input"""
+        if not self.enabled:
+            return None
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT fingerprint, state, updated_at FROM step_journal WHERE environment = ? AND request_id = ?",
+            (environment, request_id)
+        )
+        if not rows:
+            return None
+        stored_fingerprint, state, updated_at = rows[0]
+        if stored_fingerprint != fingerprint:
+            logger.info(f"Journal entry for {request_id} was recorded for different input, starting over")
+            return None
+        if updated_at + self.retention_seconds < time.time():
+            return None
+        return json.loads(state)
+
+    async def save(self, environment: str, request_id: str, fingerprint: str, state: Dict[str, Any]):
+        if not self.enabled:
+            return
+        await asyncio.to_thread(
+            self._execute,
+            """
+            INSERT INTO step_journal (environment, request_id, fingerprint, state, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (environment, request_id) DO UPDATE SET
+                fingerprint = excluded.fingerprint,
+                state = excluded.state,
+                updated_at = excluded.updated_at
+            """,
+            (environment, request_id, fingerprint, json.dumps(state), time.time())
+        )
+
+    async def purge_expired(self) -> int:
+        if not self.enabled:
+            return 0
+        rows = await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM step_journal WHERE updated_at < ? RETURNING request_id",
+            (time.time() - self.retention_seconds,)
+        )
+        return len(rows)
+
+# Journal for the process-and-update pipeline, opened and closed with the app lifespan
+process_journal = StepJournal(
+    path=settings.JOURNAL_DB_PATH,
+    retention_seconds=settings.JOURNAL_RETENTION_SECONDS,
+    enabled=settings.JOURNAL_ENABLED
+)
@@ -0,0 +1,17 @@
+from typing import Any, Callable, Optional, Union
+
+import orjson
+
+# Single JSON layer for the hot paths: Bubble bulk bodies, NDJSON replies and streamed results.
+# Encoding goes straight to UTF-8 bytes, so nothing builds an intermediate str.
+
+def dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    return orjson.dumps(value, default=default)
+
+def dumps_line(value: Any) -> bytes:
+    """Encode one NDJSON line, newline included"""
+    return orjson.dumps(value, option=orjson.OPT_APPEND_NEWLINE)
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON; malformed input raises ValueError (orjson.JSONDecodeError)"""
+    return orjson.loads(data)
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Tuple
+import asyncio
+import logging
+
+from services.bubble_client import get_bubble_client, BubbleAPIError
+from services.records import invalidate_cached_record
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class ListFieldReadError(BubbleAPIError):
+    """Raised when the record whose list field should be extended can't be fetched"""
+
+ListKey = Tuple[str, str, str, str]
+
+class ListAppender:
+    """Appends IDs to a Bubble list field with one read-modify-write per batch of callers.
+
+    Bubble only accepts the whole list on PATCH, so concurrent appends to the same record
+    would overwrite each other. Each (environment, data type, record, field) has at most one
+    writer task, which acts as the per-record lock: appends arriving while it is busy are
+    queued and merged into its next GET + PATCH instead of being lost.
+    """
+
+    def __init__(self):
+        self._pending: Dict[ListKey, List[Tuple[List[str], asyncio.Future]]] = {}
+        self._writers: Dict[ListKey, asyncio.Task] = {}
+        self.appends = 0
+        self.writes = 0
+        self.patches = 0
+
+    async def append(
+        self,
+        data_type: str,
+        record_id: str,
+        field: str,
+        values: List[str],
+        environment: str = "version-test"
+    ) -> Dict[str, Any]:
+        """Add `values` to the list field, skipping ones already present.
+
+        Returns previous_list, updated_list, added and already_present (for this caller's values)
+        and http_status (None when nothing had to be written). Raises ListFieldReadError if the
+        record can't be read and BubbleAPIError if the PATCH fails.
+        """
+        key = (environment, data_type, record_id, field)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, []).append((values, future))
+        self.appends += 1
+        if key not in self._writers:
+            self._writers[key] = asyncio.ensure_future(self._write_pending(key))
+
+        result = await future
+        previous = set(result["previous_list"])
+        return {
+            **result,
+            "added": [value for value in dict.fromkeys(values) if value not in previous],
+            "already_present": [value for value in dict.fromkeys(values) if value in previous]
+        }
+
+    async def _write_pending(self, key: ListKey):
+        try:
+            while self._pending.get(key):
+                waiters = self._pending.pop(key)
+                try:
+                    result = await self._read_modify_write(key, [value for values, _ in waiters for value in values])
+                except Exception as e:
+                    for _, future in waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for _, future in waiters:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            del self._writers[key]
+
+    async def _read_modify_write(self, key: ListKey, values: List[str]) -> Dict[str, Any]:
+        environment, data_type, record_id, field = key
+        bubble = get_bubble_client()
+        self.writes += 1
+
+        get_response = await bubble.get(data_type, record_id, environment)
+        if get_response.status_code != 200:
+            raise ListFieldReadError(get_response.status_code, get_response.text)
+        current_list = get_response.json().get("response", {}).get(field, [])
+        if not isinstance(current_list, list):
+            current_list = []
+
+        new_values = [value for value in dict.fromkeys(values) if value not in current_list]
+        if not new_values:
+            return {"previous_list": current_list, "updated_list": current_list, "http_status": None}
+
+        updated_list = current_list + new_values
+        logger.info(f"Appending {len(new_values)} ID(s) to {field} of {data_type} record {record_id}")
+        response = await bubble.patch(data_type, record_id, {field: updated_list}, environment)
+        invalidate_cached_record(data_type, record_id, environment)
+        self.patches += 1
+        if response.status_code not in [200, 204]:
+            raise BubbleAPIError(response.status_code, response.text)
+
+        return {"previous_list": current_list, "updated_list": updated_list, "http_status": response.status_code}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "appends": self.appends,
+            "writes": self.writes,
+            "patches": self.patches,
+            "active_records": len(self._writers)
+        }
+
+# Shared appender so every list update in the process goes through the same per-record writer
+list_appender = ListAppender()
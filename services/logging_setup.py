@@ -0,0 +1,216 @@
+from typing import Any, Dict, NamedTuple, Optional
+from contextvars import ContextVar
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import time
+
+from config import settings
+from services import json_codec
+
+REDACTED = "[REDACTED]"
+
+# Strings and lists longer than this are replaced by their size in payload summaries
+SUMMARY_MAX_STRING_CHARS = 80
+SUMMARY_MAX_IDS = 5
+
+_SECRET_KEY_PATTERN = re.compile(r"authorization|token|api[_-]?key|secret|password", re.IGNORECASE)
+_BEARER_PATTERN = re.compile(r"(Bearer\s+)[^\s'\",}]+", re.IGNORECASE)
+_SECRET_VALUE_PATTERN = re.compile(
+    r"""(["']?(?:authorization|[a-z_-]*token|[a-z_-]*api[_-]?key)["']?\s*[:=]\s*["']?)(?!Bearer\b)[^\s'",}]+""",
+    re.IGNORECASE
+)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "method", "path"}
+
+def _configured_secrets():
+    # Very short values (e.g. test placeholders) would blank out unrelated text
+    return [secret for secret in (settings.BUBBLE_API_TOKEN, settings.API_KEY) if secret and len(secret) >= 8]
+
+def redact(text: str) -> str:
+    """Mask the configured tokens, bearer credentials and key/token assignments in a log line"""
+    for secret in _configured_secrets():
+        text = text.replace(secret, REDACTED)
+    text = _BEARER_PATTERN.sub(rf"\1{REDACTED}", text)
+    return _SECRET_VALUE_PATTERN.sub(rf"\1{REDACTED}", text)
+
+def summarize(value: Any) -> Any:
+    """Loggable stand-in for a payload: structure, counts, sizes and leading IDs instead of contents.
+
+    Values under secret-looking keys (authorization, token, api key, ...) are always redacted.
+    """
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and _SECRET_KEY_PATTERN.search(key) else summarize(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        summary: Dict[str, Any] = {"count": len(value)}
+        leading = value[:SUMMARY_MAX_IDS]
+        if leading and all(isinstance(item, str) and len(item) <= SUMMARY_MAX_STRING_CHARS for item in leading):
+            summary["ids"] = list(leading) + (["..."] if len(value) > SUMMARY_MAX_IDS else [])
+        return summary
+    if isinstance(value, str):
+        return redact(value) if len(value) <= SUMMARY_MAX_STRING_CHARS else f"<{len(value)} chars>"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    return value
+
+class LogContext(NamedTuple):
+    method: str
+    path: str
+    level: int
+    sampled: bool
+
+_log_context: ContextVar[Optional[LogContext]] = ContextVar("log_context", default=None)
+
+def _level(name: str) -> int:
+    level = logging.getLevelName(name.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+def _longest_prefix_match(path: str, overrides: Dict[str, Any]) -> Optional[Any]:
+    matches = [prefix for prefix in overrides if path.startswith(prefix)]
+    return overrides[max(matches, key=len)] if matches else None
+
+def log_context_for(method: str, path: str) -> LogContext:
+    """Resolve the level and sampling decision for one request (sampling is per request, not per record)"""
+    route_level = _longest_prefix_match(path, settings.LOG_ROUTE_LEVELS)
+    sample_rate = _longest_prefix_match(path, settings.LOG_ROUTE_SAMPLE_RATES)
+    return LogContext(
+        method=method,
+        path=path,
+        level=_level(route_level) if route_level is not None else _level(settings.LOG_LEVEL),
+        sampled=sample_rate is None or random.random() < sample_rate
+    )
+
+class LogContextMiddleware:
+    """ASGI middleware that makes the request's route and log policy visible to every log call it triggers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _log_context.set(log_context_for(scope["method"], scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _log_context.reset(token)
+
+class RouteLevelFilter(logging.Filter):
+    """Drop records below the route's level, and records below WARNING from unsampled requests"""
+
+    def __init__(self, default_level: int):
+        super().__init__()
+        self.default_level = default_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        if context is None:
+            return record.levelno >= self.default_level
+        if record.levelno < context.level:
+            return False
+        return record.levelno >= logging.WARNING or context.sampled
+
+class RedactingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread, so formatting and I/O happen off the event loop.
+
+    Only the cheap, request-bound work is done here: resolving and redacting the message,
+    snapshotting `extra` fields as summaries and attaching the request route. A full queue
+    drops the record rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_info:
+            record.exc_text = redact(logging.Formatter().formatException(record.exc_info))
+            record.exc_info = None
+        for key, value in list(vars(record).items()):
+            if key not in _STANDARD_ATTRIBUTES:
+                setattr(record, key, summarize(value))
+        context = _log_context.get()
+        if context is not None:
+            record.method = context.method
+            record.path = context.path
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request method/path and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, "path", None):
+            entry["method"] = record.method
+            entry["path"] = record.path
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json_codec.dumps(entry, default=str).decode("utf-8")
+
+_handler: Optional[RedactingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging():
+    """Route all logging through the redacting queue handler and a background listener thread"""
+    global _handler, _listener
+    if _listener is not None:
+        return
+
+    default_level = _level(settings.LOG_LEVEL)
+    output = logging.StreamHandler()
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(StructuredFormatter())
+    else:
+        output.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    _handler = RedactingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _handler.addFilter(RouteLevelFilter(default_level))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    # Let records through to the filter for routes configured below the default level
+    root.setLevel(min([default_level] + [_level(level) for level in settings.LOG_ROUTE_LEVELS.values()]))
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0
+    }
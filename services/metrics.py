@@ -0,0 +1,188 @@
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+import bisect
+import math
+import time
+
+# Latency buckets in seconds, spanning fast cache hits to Bubble's slowest bulk writes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """A metric family with a fixed set of label names; label values are passed as a tuple in that order"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float):
+        self._values[labels] = value
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram in the Prometheus exposition format"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bucket_names = self.label_names + ("le",)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, labels + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+# A collector returns metrics built on demand from other components' stats at scrape time
+Collector = Callable[[], Iterable[Metric]]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics_registry = MetricsRegistry()
+
+# Upstream Bubble calls, recorded once per attempt by BubbleClient._send
+bubble_request_duration = metrics_registry.register(Histogram(
+    "bubble_request_duration_seconds",
+    "Latency of each Bubble Data API attempt (until headers for streamed calls, full body otherwise)",
+    ("data_type", "operation", "environment", "status")
+))
+bubble_requests_in_flight = metrics_registry.register(Gauge(
+    "bubble_requests_in_flight",
+    "Bubble Data API calls currently waiting for a response",
+    ("operation", "environment")
+))
+bubble_request_retries = metrics_registry.register(Counter(
+    "bubble_request_retries_total",
+    "Bubble Data API calls retried after a retryable status or transport error",
+    ("data_type", "operation", "environment")
+))
+bubble_bulk_records = metrics_registry.register(Counter(
+    "bubble_bulk_records_total",
+    "Records sent through Bubble /bulk uploads, by per-record result",
+    ("data_type", "environment", "result")
+))
+bubble_rate_limit_wait = metrics_registry.register(Histogram(
+    "bubble_rate_limit_wait_seconds",
+    "Time each Bubble call queued for an outbound rate-limit token (0 when one was available)",
+    ("bucket",)
+))
+
+# Incoming requests, recorded by MetricsMiddleware
+http_request_duration = metrics_registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Latency of requests served by this API, until the response body is sent",
+    ("method", "route", "status")
+))
+http_requests_in_flight = metrics_registry.register(Gauge(
+    "http_requests_in_flight",
+    "Requests to this API currently being served"
+))
+
+class MetricsMiddleware:
+    """ASGI middleware timing every request, labeled by route template rather than raw path"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            http_request_duration.observe(
+                (scope["method"], getattr(route, "path", "unmatched"), str(status_code)),
+                time.perf_counter() - started
+            )
@@ -0,0 +1,52 @@
+from typing import Any, AsyncIterator, Dict, List, Tuple, Union
+
+from services import json_codec
+
+async def iter_ndjson_lines(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into non-empty lines, holding at most one partial line in memory"""
+    buffer = b""
+    async for chunk in byte_chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def iter_ndjson(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], ValueError]]]:
+    """Decode NDJSON incrementally, yielding (index, object) per line.
+
+    A malformed line yields its ValueError at that index instead of aborting the stream.
+    """
+    index = 0
+    async for line in iter_ndjson_lines(byte_chunks):
+        try:
+            yield index, json_codec.loads(line)
+        except ValueError as e:
+            yield index, e
+        index += 1
+
+class BulkResponseTally:
+    """Running tally of a Bubble /bulk reply, filled one line at a time"""
+
+    def __init__(self):
+        self.responses: List[Dict[str, Any]] = []
+        self.successful_count = 0
+        self.created_ids: List[str] = []
+        self.errors: List[Dict[str, Any]] = []
+
+    def add(self, resp: Dict[str, Any]):
+        self.responses.append(resp)
+        if resp.get("status") == "success":
+            self.successful_count += 1
+            if "id" in resp:
+                self.created_ids.append(resp["id"])
+        else:
+            self.errors.append(resp)
+
+    def extend(self, other: "BulkResponseTally"):
+        self.responses.extend(other.responses)
+        self.successful_count += other.successful_count
+        self.created_ids.extend(other.created_ids)
+        self.errors.extend(other.errors)
@@ -0,0 +1,267 @@
+from typing import Optional, Dict, List, Tuple
+import logging
+
+import httpx
+from fastapi import HTTPException, status
+
+from config import settings
+from services.bubble_client import get_bubble_client, get_bubble_data_url, BubbleAPIError
+from services.bulk import bulk_create_records
+from services.cache import TTLCache, MISSING
+from services.concurrency import map_with_environment_limit, SingleFlight
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Process-wide (environment, name) -> PromptField ID cache, with short-lived negative entries
+promptfield_cache = TTLCache(
+    max_entries=settings.PROMPTFIELD_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROMPTFIELD_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.PROMPTFIELD_CACHE_NEGATIVE_TTL_SECONDS
+)
+
+# Coalesces per-name fallback searches ("search") and bulk creates ("bulk_create") of the same
+# (environment, name), so concurrent requests introducing a new field create one record
+promptfield_singleflight = SingleFlight()
+
+def _require_promptfield_config(environment: str):
+    """Raise a 500 if the PromptField data type or API token is not configured"""
+    base_url = get_bubble_data_url(settings.BUBBLE_PROMPTFIELD_DATA_TYPE, environment)
+    if not base_url or not settings.BUBBLE_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Bubble PromptField API configuration is missing. Please check environment variables."
+        )
+
+async def create_promptfields_bulk(
+    attribute_names: List[str],
+    environment: str = "version-test"
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Create many PromptFields with one call to the /bulk endpoint.
+
+    Names being created by a concurrent request are joined rather than created twice,
+    and names already in the cache are reused. Returns `(ids, errors)` keyed by name.
+    """
+
+    _require_promptfield_config(environment)
+
+    outcomes = await promptfield_singleflight.do_batch(
+        [("bulk_create", environment, name) for name in attribute_names],
+        lambda keys: _bulk_create_promptfields([key[2] for key in keys], environment)
+    )
+
+    ids: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    for (_, _, name), outcome in outcomes.items():
+        if isinstance(outcome, BaseException):
+            errors[name] = str(outcome)
+        else:
+            ids[name] = outcome
+    return ids, errors
+
+async def _bulk_create_promptfields(attribute_names: List[str], environment: str) -> Dict[tuple, object]:
+    """POST missing PromptFields as NDJSON and map each response line back to its name, in order"""
+
+    outcomes: Dict[tuple, object] = {}
+    names_to_create = []
+    for name in attribute_names:
+        cached_id = promptfield_cache.get((environment, name))
+        if cached_id is not MISSING and cached_id is not None:
+            outcomes[("bulk_create", environment, name)] = cached_id
+        else:
+            names_to_create.append(name)
+
+    if not names_to_create:
+        return outcomes
+
+    logger.info(f"Bulk creating {len(names_to_create)} PromptField records")
+
+    try:
+        bulk_result = await bulk_create_records(
+            settings.BUBBLE_PROMPTFIELD_DATA_TYPE,
+            ({"Name": name} for name in names_to_create),
+            environment
+        )
+    except (httpx.HTTPError, BubbleAPIError) as e:
+        error = HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to create PromptField records: {str(e)}"
+        )
+        outcomes.update({("bulk_create", environment, name): error for name in names_to_create})
+        return outcomes
+
+    # Response index i describes names_to_create[i]
+    for name, line_data in zip(names_to_create, bulk_result.responses):
+        key = ("bulk_create", environment, name)
+        if line_data.get("status") == "success" and line_data.get("id"):
+            promptfield_cache.set((environment, name), line_data["id"])
+            outcomes[key] = line_data["id"]
+        else:
+            outcomes[key] = RuntimeError(f"Failed to create PromptField record: {line_data}")
+
+    return outcomes
+
+async def search_promptfield_only(attribute_name: str, environment: str = "version-test") -> Optional[str]:
+    """Search for PromptField by name, return record ID if found, None if not found (no creation).
+
+    Raises BubbleAPIError if Bubble doesn't answer the search with 200.
+    """
+
+    # Validate Bubble configuration
+    _require_promptfield_config(environment)
+
+    cached_id = promptfield_cache.get((environment, attribute_name))
+    if cached_id is not MISSING:
+        return cached_id
+
+    return await promptfield_singleflight.do(
+        ("search", environment, attribute_name),
+        lambda: _search_promptfield(attribute_name, environment)
+    )
+
+async def _search_promptfield(attribute_name: str, environment: str) -> Optional[str]:
+    """Run the upstream `Name equals` search and record the outcome in the cache"""
+
+    # Search for existing record
+    search_constraints = [{
+        "key": "Name",
+        "constraint_type": "equals",
+        "value": attribute_name
+    }]
+
+    try:
+        # Search for existing record
+        search_response = await get_bubble_client().search(
+            settings.BUBBLE_PROMPTFIELD_DATA_TYPE, search_constraints, environment, limit=1
+        )
+
+        if search_response.status_code == 200:
+            search_data = search_response.json()
+            results = search_data.get("response", {}).get("results", [])
+
+            if results:
+                # Record found, return its ID
+                record_id = results[0].get("_id")
+                logger.info(f"Found existing PromptField record for '{attribute_name}': {record_id}")
+                promptfield_cache.set((environment, attribute_name), record_id)
+                return record_id
+
+            # Only a successful empty search proves the record doesn't exist
+            promptfield_cache.set_negative((environment, attribute_name))
+            logger.info(f"No existing PromptField found for '{attribute_name}'")
+            return None
+
+        # A failed search says nothing about whether the record exists, so it must not look like a miss
+        raise BubbleAPIError(search_response.status_code, search_response.text)
+
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to connect to Bubble API: {str(e)}"
+        )
+
+async def search_promptfields_by_names(attribute_names: List[str], environment: str = "version-test") -> Dict[str, str]:
+    """Look up many PromptFields in one `Name in [...]` search, following the cursor across pages.
+
+    Returns a mapping of name -> record ID for the names that exist. When Bubble holds several
+    records with the same name the first one returned wins, matching `search_promptfield_only`.
+    """
+
+    _require_promptfield_config(environment)
+
+    constraints = [{
+        "key": "Name",
+        "constraint_type": "in",
+        "value": attribute_names
+    }]
+
+    found = {}
+    async for page in get_bubble_client().iter_search_pages(
+        settings.BUBBLE_PROMPTFIELD_DATA_TYPE, constraints, environment
+    ):
+        for record in page:
+            name = record.get("Name")
+            if name is not None and name not in found:
+                found[name] = record.get("_id")
+
+    logger.info(f"Batched PromptField search matched {len(found)} of {len(attribute_names)} names")
+    return found
+
+async def resolve_promptfield_ids(
+    attribute_names: List[str],
+    environment: str = "version-test",
+    create_missing: bool = False
+) -> Tuple[Dict[str, Optional[str]], Dict[str, str]]:
+    """Resolve attribute names to PromptField IDs with a single batched search.
+
+    Falls back to per-attribute lookups only if the batched search fails; those run
+    concurrently within the environment's concurrency limit. With `create_missing`,
+    every miss is created in a single bulk call. Returns
+    `(ids, errors)`: `ids` maps each resolved name to its record ID (None when not
+    found and `create_missing` is False), `errors` maps failed names to an error message.
+    """
+
+    # Deduplicate while keeping first-seen order
+    distinct_names = list(dict.fromkeys(attribute_names))
+    ids: Dict[str, Optional[str]] = {}
+    errors: Dict[str, str] = {}
+
+    # Serve what we can from the cache and only search for the rest
+    uncached_names = []
+    for name in distinct_names:
+        cached_id = promptfield_cache.get((environment, name))
+        if cached_id is MISSING:
+            uncached_names.append(name)
+        elif cached_id is None and create_missing:
+            # Cached as missing but we're allowed to create it
+            uncached_names.append(name)
+        else:
+            ids[name] = cached_id
+
+    if not uncached_names:
+        return ids, errors
+
+    try:
+        found = await search_promptfields_by_names(uncached_names, environment)
+    except HTTPException:
+        # Configuration errors apply to every attribute, let the caller handle them
+        raise
+    except (httpx.HTTPError, BubbleAPIError, ValueError) as e:
+        logger.warning(f"Batched PromptField search failed, falling back to per-attribute lookups: {str(e)}")
+        _collect_outcomes(
+            uncached_names,
+            await map_with_environment_limit(
+                environment, lambda name: search_promptfield_only(name, environment), uncached_names
+            ),
+            ids,
+            errors
+        )
+        found = {name: ids[name] for name in uncached_names if ids.get(name)}
+
+    names_to_create = []
+    for name in uncached_names:
+        if name in errors:
+            continue
+        if name in found:
+            ids[name] = found[name]
+            promptfield_cache.set((environment, name), found[name])
+        elif create_missing:
+            names_to_create.append(name)
+        else:
+            ids[name] = None
+            promptfield_cache.set_negative((environment, name))
+
+    if names_to_create:
+        created_ids, create_errors = await create_promptfields_bulk(names_to_create, environment)
+        ids.update(created_ids)
+        errors.update(create_errors)
+
+    return ids, errors
+
+def _collect_outcomes(names: List[str], outcomes: List, ids: Dict[str, Optional[str]], errors: Dict[str, str]):
+    """Split per-name results from map_with_environment_limit into ids and error messages"""
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            errors[name] = str(outcome)
+        else:
+            ids[name] = outcome
@@ -0,0 +1,201 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+
+from config import settings
+from services.cache import TTLCache, MISSING
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PROMPT_PREVIEW_CHARS = 100
+
+# {{NAME}} placeholders; whitespace inside the braces is allowed
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+class CompiledPrompt:
+    """Prompt text split once into literal and placeholder segments.
+
+    Rendering joins the segments, so any number of named placeholders is filled in one pass.
+    Placeholders without a value are left in the output unchanged.
+    """
+
+    def __init__(self, content: str):
+        self.segments: List[Union[str, Tuple[str, str]]] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(content):
+            if match.start() > position:
+                self.segments.append(content[position:match.start()])
+            self.segments.append((match.group(1), match.group(0)))
+            position = match.end()
+        if position < len(content):
+            self.segments.append(content[position:])
+        self.placeholders = {segment[0] for segment in self.segments if isinstance(segment, tuple)}
+
+    def render(self, values: Dict[str, str]) -> str:
+        return "".join(
+            segment if isinstance(segment, str) else values.get(segment[0], segment[1])
+            for segment in self.segments
+        )
+
+class PromptEntry:
+    """A prompt file held in memory together with the metadata the /prompts endpoints return"""
+
+    def __init__(self, name: str, file_path: str, mtime_ns: int, size_bytes: int, content: Optional[str] = None, error: Optional[str] = None):
+        self.name = name
+        self.file_path = file_path
+        self.mtime_ns = mtime_ns
+        self.size_bytes = size_bytes
+        self.content = content
+        self.error = error
+        if content is not None:
+            self.size_chars: Optional[int] = len(content)
+            self.preview: Optional[str] = content[:PROMPT_PREVIEW_CHARS] + "..." if len(content) > PROMPT_PREVIEW_CHARS else content
+            self.content_hash: Optional[str] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            self.compiled: Optional[CompiledPrompt] = CompiledPrompt(content)
+        else:
+            self.size_chars = None
+            self.preview = None
+            self.content_hash = None
+            self.compiled = None
+
+class PromptRegistry:
+    """In-memory copy of the *.txt prompt files in a directory.
+
+    The directory is loaded once; a background task re-stats it every `reload_interval`
+    seconds and re-reads only files whose mtime or size changed, so lookups never touch disk.
+    """
+
+    def __init__(self, directory: str, reload_interval: float):
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self._entries: Dict[str, PromptEntry] = {}
+        self._loaded = False
+        self._watcher: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    def _load_file(self, name: str, path: str, stat: os.stat_result) -> PromptEntry:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            return PromptEntry(name, path, stat.st_mtime_ns, stat.st_size, content=content)
+        except Exception as e:
+            logger.warning(f"Could not read prompt file '{path}': {str(e)}")
+            return PromptEntry(name, path, stat.st_mtime_ns, stat.st_size, error=str(e))
+
+    def refresh(self) -> int:
+        """Sync the registry with the directory (blocking). Returns the number of files added, changed or removed."""
+        self.directory.mkdir(exist_ok=True)
+        entries: Dict[str, PromptEntry] = {}
+        changed = 0
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith(".txt") or not item.is_file():
+                    continue
+                name = item.name[:-len(".txt")]
+                stat = item.stat()
+                current = self._entries.get(name)
+                if current is not None and current.mtime_ns == stat.st_mtime_ns and current.size_bytes == stat.st_size:
+                    entries[name] = current
+                else:
+                    entries[name] = self._load_file(name, str(self.directory / item.name), stat)
+                    changed += 1
+        changed += len(self._entries.keys() - entries.keys())
+        # Swap in one assignment so readers never see a half-built registry
+        self._entries = entries
+        self._loaded = True
+        if changed:
+            self.reloads += 1
+        return changed
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def get(self, name: str) -> Optional[PromptEntry]:
+        self._ensure_loaded()
+        return self._entries.get(name)
+
+    def list(self) -> List[PromptEntry]:
+        self._ensure_loaded()
+        return list(self._entries.values())
+
+    async def start(self):
+        await asyncio.to_thread(self.refresh)
+        logger.info(f"Loaded {len(self._entries)} prompt(s) from {self.directory}")
+        if self.reload_interval > 0 and self._watcher is None:
+            self._watcher = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                changed = await asyncio.to_thread(self.refresh)
+                if changed:
+                    logger.info(f"Reloaded prompts from {self.directory} ({changed} file(s) changed)")
+            except Exception as e:
+                logger.error(f"Failed to refresh prompts from {self.directory}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "prompts": len(self._entries),
+            "reload_interval": self.reload_interval,
+            "reloads": self.reloads
+        }
+
+# Shared registry for the /prompts endpoints, loaded and watched during the app lifespan
+prompt_registry = PromptRegistry(settings.PROMPTS_DIR, settings.PROMPTS_RELOAD_INTERVAL_SECONDS)
+
+# Rendered prompt text keyed by (prompt hash, environment, template record ID, template Modified Date)
+prompt_render_cache = TTLCache(
+    max_entries=settings.PROMPT_RENDER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROMPT_RENDER_CACHE_TTL_SECONDS
+)
+
+def _placeholder_value(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
+
+def template_placeholder_values(prompt: PromptEntry, template_record: Dict[str, Any]) -> Dict[str, str]:
+    """Values for the prompt's placeholders taken from a PromptTemplate(Custom) record.
+
+    {{JSON_STRUCTURE}} is the record's json_template; any other {{NAME}} is filled from the
+    record field of the same name (exact, then lower-case), so new placeholders need no code changes.
+    """
+    values = {"JSON_STRUCTURE": _placeholder_value(template_record.get("json_template", ""))}
+    for name in prompt.compiled.placeholders - values.keys():
+        for field in (name, name.lower()):
+            if field in template_record:
+                values[name] = _placeholder_value(template_record[field])
+                break
+    return values
+
+def render_prompt_with_template(
+    prompt: PromptEntry,
+    template_record: Dict[str, Any],
+    record_id: str,
+    environment: str
+) -> str:
+    """Render a prompt against a template record, reusing the output while neither has changed"""
+    modified_date = template_record.get("Modified Date")
+    key = (prompt.content_hash, environment, record_id, modified_date)
+    if modified_date is not None:
+        cached = prompt_render_cache.get(key)
+        if cached is not MISSING:
+            return cached
+
+    rendered = prompt.compiled.render(template_placeholder_values(prompt, template_record))
+    if modified_date is not None:
+        prompt_render_cache.set(key, rendered)
+    return rendered
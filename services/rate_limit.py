@@ -0,0 +1,134 @@
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+import httpx
+
+from config import settings
+from services.metrics import bubble_rate_limit_wait
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rate limit class of each BubbleClient operation
+OPERATION_CLASSES = {
+    "search": "search",
+    "get": "read",
+    "create": "write",
+    "patch": "write",
+    "bulk": "bulk"
+}
+
+class RateLimitTimeout(httpx.TransportError):
+    """Raised when a Bubble call would have to wait longer than the configured maximum for a token.
+
+    Subclasses httpx.TransportError so existing `except httpx.HTTPError` handlers report it.
+    """
+
+    def __init__(self, key: str, wait: float, max_wait: float):
+        self.key = key
+        self.wait = wait
+        super().__init__(f"Outbound rate limit for Bubble {key} exceeded (wait {wait:.1f}s > max {max_wait:.1f}s)")
+
+class TokenBucket:
+    """Token bucket that queues callers in arrival order.
+
+    Each caller reserves the next token up front (the balance may go negative), then
+    sleeps until that token has refilled, so waiters are served first come, first served.
+    """
+
+    def __init__(self, key: str, rate: float, capacity: float):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.delayed = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> float:
+        """Take one token, waiting up to `max_wait` seconds for it. Returns the time waited."""
+        self._refill(time.monotonic())
+        wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+        if wait > max_wait:
+            self.timeouts += 1
+            raise RateLimitTimeout(self.key, wait, max_wait)
+
+        self._tokens -= 1
+        self.acquired += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the reserved token back to the callers queued behind us
+                self._tokens = min(self.capacity, self._tokens + 1)
+                raise
+            finally:
+                self.waiting -= 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "timeouts": self.timeouts,
+            "waiting": self.waiting,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+            "avg_wait_seconds": round(self.total_wait_seconds / self.delayed, 3) if self.delayed else 0.0
+        }
+
+def _configured_rate(environment: str, operation_class: str) -> float:
+    """Requests per second for an environment and operation class; 0 means unlimited"""
+    limits = settings.BUBBLE_RATE_LIMITS
+    return limits.get(f"{environment}:{operation_class}", limits.get(operation_class, 0.0))
+
+def _configured_capacity(environment: str, operation_class: str, rate: float) -> float:
+    """Burst size for an environment and operation class; defaults to `rate` x the burst seconds"""
+    bursts = settings.BUBBLE_RATE_LIMIT_BURSTS
+    burst = bursts.get(f"{environment}:{operation_class}", bursts.get(operation_class))
+    return max(1.0, burst if burst is not None else rate * settings.BUBBLE_RATE_LIMIT_BURST_SECONDS)
+
+_buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+
+def get_token_bucket(environment: str, operation: str) -> Optional[TokenBucket]:
+    """Return the bucket shared by one environment and operation class, or None if it is unlimited"""
+    operation_class = OPERATION_CLASSES.get(operation, operation)
+    key = (environment, operation_class)
+    if key not in _buckets:
+        rate = _configured_rate(environment, operation_class)
+        _buckets[key] = TokenBucket(
+            f"{environment}:{operation_class}",
+            rate,
+            _configured_capacity(environment, operation_class, rate)
+        ) if rate > 0 else None
+    return _buckets[key]
+
+async def acquire_rate_limit(environment: str, operation: str) -> float:
+    """Wait for an outbound token for this Bubble call. Raises RateLimitTimeout past the max wait."""
+    bucket = get_token_bucket(environment, operation)
+    if bucket is None:
+        return 0.0
+    wait = await bucket.acquire(settings.BUBBLE_RATE_LIMIT_MAX_WAIT)
+    bubble_rate_limit_wait.observe((bucket.key,), wait)
+    if wait > 1.0:
+        logger.info(f"Bubble {bucket.key} call waited {wait:.2f}s for the outbound rate limit")
+    return wait
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    return {bucket.key: bucket.stats() for bucket in _buckets.values() if bucket is not None}
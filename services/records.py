@@ -0,0 +1,274 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+
+from config import settings
+from services.bubble_client import get_bubble_client, BubbleAPIError, BUBBLE_MAX_PAGE_SIZE
+from services.cache import TTLCache, MISSING
+from services.concurrency import map_with_environment_limit, SingleFlight
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class RecordCache:
+    """Read-through cache of single Bubble records with stale-while-revalidate.
+
+    A record younger than `ttl_seconds` is served from memory. For a further `stale_seconds`
+    it is still served immediately while one background fetch revalidates it; the entry is
+    replaced when Bubble reports a different Modified Date. Concurrent misses for the same
+    record share one GET. Raises BubbleAPIError when Bubble does not answer 200.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, stale_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds + stale_seconds)
+        self._singleflight = SingleFlight()
+        self._revalidating: Set[Tuple[str, str, str]] = set()
+        self._background: Set[asyncio.Task] = set()
+        # (generation, fetches in flight) per record being fetched; invalidate() bumps the generation so
+        # a fetch started before the write doesn't store its result. Dropped when the last fetch ends.
+        self._fetches: Dict[Tuple[str, str, str], Tuple[int, int]] = {}
+        self.stale_served = 0
+        self.revalidations = 0
+        self.revalidation_failures = 0
+        self.changed = 0
+
+    async def get(self, data_type: str, record_id: str, environment: str = "version-test") -> Dict[str, Any]:
+        key = (environment, data_type, record_id)
+        entry = self._cache.get(key)
+        if entry is not MISSING:
+            record, fetched_at, _ = entry
+            if time.monotonic() - fetched_at >= self.ttl_seconds:
+                self.stale_served += 1
+                self._revalidate_in_background(key, record)
+            return record
+        return await self._singleflight.do(key, lambda: self._load(key))
+
+    async def _load(self, key: Tuple[str, str, str], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        environment, data_type, record_id = key
+        generation = self.begin_fetch(data_type, record_id, environment)
+        try:
+            response = await get_bubble_client().get(data_type, record_id, environment)
+            if response.status_code != 200:
+                raise BubbleAPIError(response.status_code, response.text)
+            data = response.json()
+            record = data.get("response", data)
+
+            if previous is not None and previous.get("Modified Date") != record.get("Modified Date"):
+                self.changed += 1
+                logger.info(f"{self.name} record {record_id} changed in Bubble, cache entry replaced")
+            # Don't resurrect a record that was invalidated while this fetch was in flight
+            if generation == self._fetches[key][0]:
+                self._cache.set(key, (record, time.monotonic(), len(response.content)))
+            return record
+        finally:
+            self.end_fetch(data_type, record_id, environment)
+
+    def _revalidate_in_background(self, key: Tuple[str, str, str], stale_record: Dict[str, Any]):
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+
+        async def revalidate():
+            self.revalidations += 1
+            try:
+                await self._singleflight.do(key, lambda: self._load(key, stale_record))
+            except Exception as e:
+                # Keep serving the stale copy until it expires
+                self.revalidation_failures += 1
+                logger.warning(f"Background refresh of {self.name} record {key[2]} failed: {str(e)}")
+            finally:
+                self._revalidating.discard(key)
+
+        # Hold a reference so the task isn't garbage-collected mid-flight
+        task = asyncio.ensure_future(revalidate())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def peek(self, data_type: str, record_id: str, environment: str = "version-test") -> Optional[Dict[str, Any]]:
+        """Return the record if it is cached and still fresh, without fetching"""
+        entry = self._cache.get((environment, data_type, record_id))
+        if entry is MISSING or time.monotonic() - entry[1] >= self.ttl_seconds:
+            return None
+        return entry[0]
+
+    def begin_fetch(self, data_type: str, record_id: str, environment: str = "version-test") -> int:
+        """Register a fetch of a record and return the generation to pass to put(); always pair with end_fetch()"""
+        key = (environment, data_type, record_id)
+        generation, fetches = self._fetches.get(key, (0, 0))
+        self._fetches[key] = (generation, fetches + 1)
+        return generation
+
+    def end_fetch(self, data_type: str, record_id: str, environment: str = "version-test"):
+        key = (environment, data_type, record_id)
+        generation, fetches = self._fetches[key]
+        if fetches > 1:
+            self._fetches[key] = (generation, fetches - 1)
+        else:
+            del self._fetches[key]
+
+    def put(
+        self,
+        data_type: str,
+        record_id: str,
+        record: Dict[str, Any],
+        environment: str = "version-test",
+        generation: Optional[int] = None
+    ):
+        """Store a record fetched elsewhere (e.g. by a batch search).
+
+        If `generation` (from begin_fetch(), with the fetch not yet ended) is given and the record
+        was invalidated since, the fetched copy may predate the write and is not stored.
+        """
+        key = (environment, data_type, record_id)
+        if generation is not None and generation != self._fetches.get(key, (0, 0))[0]:
+            return
+        self._cache.set(key, (record, time.monotonic(), len(json.dumps(record))))
+
+    def invalidate(self, data_type: str, record_id: str, environment: str = "version-test"):
+        key = (environment, data_type, record_id)
+        # Only fetches in flight can hold an older copy; later ones start after the write
+        if key in self._fetches:
+            generation, fetches = self._fetches[key]
+            self._fetches[key] = (generation + 1, fetches)
+        self._cache.invalidate(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "approx_bytes": sum(size for _, _, size in self._cache.values()),
+            "fresh_ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "stale_served": self.stale_served,
+            "revalidations": self.revalidations,
+            "revalidation_failures": self.revalidation_failures,
+            "changed": self.changed,
+            "fetches_in_flight": len(self._fetches),
+            "singleflight": self._singleflight.stats()
+        }
+
+# PromptTemplate / PromptTemplateCustom records used by /prompts/{name}/process-template
+template_record_cache = RecordCache(
+    "PromptTemplate",
+    max_entries=settings.TEMPLATE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TEMPLATE_CACHE_TTL_SECONDS,
+    stale_seconds=settings.TEMPLATE_CACHE_STALE_SECONDS
+)
+
+# Per-data-type caches for GET /bubble/{data_type}/{record_id}; None marks a data type with caching off
+_record_caches: Dict[str, Optional[RecordCache]] = {}
+
+def get_record_cache(data_type: str) -> Optional[RecordCache]:
+    """Return the read-through cache for a data type, or None if it isn't configured for caching"""
+    if data_type not in _record_caches:
+        config = settings.RECORD_CACHE_DATA_TYPES.get(data_type, {}) if settings.RECORD_CACHE_ENABLED else {}
+        ttl_seconds = config.get("ttl_seconds", 0)
+        max_entries = int(config.get("max_entries", settings.RECORD_CACHE_DEFAULT_MAX_ENTRIES))
+        _record_caches[data_type] = RecordCache(
+            data_type,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            stale_seconds=config.get("stale_seconds", 0)
+        ) if ttl_seconds > 0 and max_entries > 0 else None
+    return _record_caches[data_type]
+
+def invalidate_cached_record(data_type: str, record_id: str, environment: str = "version-test"):
+    """Drop a record from its data type's cache after this service wrote to it"""
+    cache = get_record_cache(data_type)
+    if cache is not None:
+        cache.invalidate(data_type, record_id, environment)
+
+def record_cache_stats() -> Dict[str, Dict[str, Any]]:
+    stats = {data_type: cache.stats() for data_type, cache in _record_caches.items() if cache is not None}
+    stats["prompt_templates"] = template_record_cache.stats()
+    return stats
+
+async def _get_records_individually(data_type: str, record_ids: List[str], environment: str) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Fallback for a failed batch search: one GET per ID, bounded by the environment's concurrency limit"""
+    bubble = get_bubble_client()
+    responses = await map_with_environment_limit(
+        environment,
+        lambda record_id: bubble.get(data_type, record_id, environment),
+        record_ids
+    )
+    found: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    for record_id, response in zip(record_ids, responses):
+        if isinstance(response, Exception):
+            errors[record_id] = f"Failed to connect to Bubble API: {str(response)}"
+        elif response.status_code == 200:
+            data = response.json()
+            found[record_id] = data.get("response", data)
+        elif response.status_code != 404:
+            errors[record_id] = f"Bubble API error: {response.status_code} - {response.text}"
+    return found, errors
+
+async def _search_records_by_ids(data_type: str, record_ids: List[str], environment: str) -> Dict[str, Dict[str, Any]]:
+    """Fetch up to one page of IDs with a single `_id in [...]` search"""
+    constraints = [{"key": "_id", "constraint_type": "in", "value": record_ids}]
+    found: Dict[str, Dict[str, Any]] = {}
+    async for page in get_bubble_client().iter_search_pages(data_type, constraints, environment):
+        for record in page:
+            found[record.get("_id")] = record
+    return found
+
+async def fetch_records_by_ids(
+    data_type: str,
+    record_ids: List[str],
+    environment: str = "version-test"
+) -> Tuple[List[Dict[str, Any]], List[str], List[Dict[str, str]]]:
+    """Fetch many records of one data type by ID.
+
+    Fresh entries from the data type's record cache are used first; the rest are fetched with
+    `_id in [...]` searches of at most one page each, run concurrently within the environment's
+    limit. A chunk whose search fails is retried as single GETs once the searches are done. Returns
+    (records in request order, missing IDs in request order, per-ID errors).
+    """
+    unique_ids = list(dict.fromkeys(record_ids))
+    record_cache = get_record_cache(data_type)
+    found: Dict[str, Dict[str, Any]] = {}
+    if record_cache is not None:
+        for record_id in unique_ids:
+            record = record_cache.peek(data_type, record_id, environment)
+            if record is not None:
+                found[record_id] = record
+
+    to_fetch = [record_id for record_id in unique_ids if record_id not in found]
+    chunks = [to_fetch[i:i + BUBBLE_MAX_PAGE_SIZE] for i in range(0, len(to_fetch), BUBBLE_MAX_PAGE_SIZE)]
+    # Registered before searching so a record invalidated mid-search isn't cached from a pre-write read
+    generations = {
+        record_id: record_cache.begin_fetch(data_type, record_id, environment) for record_id in to_fetch
+    } if record_cache is not None else {}
+    try:
+        results = await map_with_environment_limit(
+            environment,
+            lambda chunk: _search_records_by_ids(data_type, chunk, environment),
+            chunks
+        )
+        errors: Dict[str, str] = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, (BubbleAPIError, httpx.HTTPError, ValueError)):
+                # Outside the search's semaphore slot, since the GETs take slots of their own
+                logger.warning(f"Batch search of {len(chunk)} {data_type} IDs failed ({str(result)}), falling back to single GETs")
+                result, chunk_errors = await _get_records_individually(data_type, chunk, environment)
+                errors.update(chunk_errors)
+            elif isinstance(result, Exception):
+                raise result
+            for record_id, record in result.items():
+                found[record_id] = record
+                if record_cache is not None:
+                    record_cache.put(data_type, record_id, record, environment, generation=generations.get(record_id))
+    finally:
+        for record_id in generations:
+            record_cache.end_fetch(data_type, record_id, environment)
+
+    records = [found[record_id] for record_id in unique_ids if record_id in found]
+    missing_ids = [record_id for record_id in unique_ids if record_id not in found and record_id not in errors]
+    error_list = [{"record_id": record_id, "error": errors[record_id]} for record_id in unique_ids if record_id in errors]
+    return records, missing_ids, error_list
@@ -0,0 +1,137 @@
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import time
+
+import httpx
+
+from config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bubble statuses worth retrying: rate limiting and transient server-side failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling Bubble while an environment's circuit is open.
+
+    Subclasses httpx.TransportError so existing `except httpx.HTTPError` handlers
+    report it like any other connection failure.
+    """
+
+    def __init__(self, environment: str, retry_after: float):
+        self.environment = environment
+        self.retry_after = retry_after
+        super().__init__(f"Bubble {environment} is failing, circuit open for another {retry_after:.0f}s")
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Delay before retry number `attempt` (1-based): Retry-After if given, else exponential backoff with full jitter"""
+    if retry_after is not None:
+        return retry_after
+    ceiling = min(settings.BUBBLE_RETRY_BACKOFF_MAX, settings.BUBBLE_RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one Bubble environment.
+
+    After `failure_threshold` failures in a row the circuit opens and calls fail fast.
+    Once `reset_seconds` have passed a single trial call is let through (half-open);
+    its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, environment: str, failure_threshold: int, reset_seconds: float):
+        self.environment = environment
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not reach Bubble right now"""
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return
+        remaining = self.opened_at + self.reset_seconds - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+            logger.info(f"Circuit for Bubble {self.environment} is half-open, sending a trial request")
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.environment, max(remaining, 0.0))
+
+    def record_success(self):
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            logger.info(f"Circuit for Bubble {self.environment} closed")
+            self.state = "closed"
+
+    def record_failure(self):
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.failure_threshold <= 0:
+            return
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit for Bubble {self.environment} opened after {self.consecutive_failures} "
+                    f"consecutive failures, failing fast for {self.reset_seconds:.0f}s"
+                )
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def abandon_call(self):
+        """Forget a call that ended without a Bubble outcome (e.g. cancelled) so a trial slot isn't leaked"""
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(environment: str) -> CircuitBreaker:
+    """Return the circuit breaker shared by all Bubble calls to one environment"""
+    breaker = _circuit_breakers.get(environment)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            environment,
+            settings.BUBBLE_CIRCUIT_FAILURE_THRESHOLD,
+            settings.BUBBLE_CIRCUIT_RESET_SECONDS
+        )
+        _circuit_breakers[environment] = breaker
+    return breaker
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {environment: breaker.stats() for environment, breaker in _circuit_breakers.items()}
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+
+from config import settings
+from services.bubble_client import get_bubble_client, BubbleAPIError
+from services.cache import TTLCache, MISSING
+from services.concurrency import SingleFlight
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def normalize_constraints(constraints: List[Dict[str, Any]]) -> str:
+    """Canonical form of a constraint list, so equivalent searches share a cache key"""
+    return json.dumps(sorted(json.dumps(constraint, sort_keys=True) for constraint in constraints))
+
+class SearchCache:
+    """Short-TTL cache of single-page Bubble search results.
+
+    Keyed by data type, environment, normalized constraints and limit. Concurrent identical
+    searches share one upstream call. Writes bump a per-(environment, data type) generation
+    that is part of the key, so every cached search of that data type is dropped at once and
+    a search still in flight from before the write can't repopulate it.
+    Raises BubbleAPIError when Bubble does not answer 200.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._singleflight = SingleFlight()
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self.invalidations = 0
+
+    async def search(
+        self,
+        data_type: str,
+        constraints: List[Dict[str, Any]],
+        environment: str = "version-test",
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return Bubble's search page ({"results": [...], "remaining": n, ...}) for these constraints"""
+        generation = self._generations.get((environment, data_type), 0)
+        key = (environment, data_type, generation, normalize_constraints(constraints), limit)
+        cached = self._cache.get(key)
+        if cached is not MISSING:
+            return cached
+        return await self._singleflight.do(key, lambda: self._load(key, data_type, constraints, environment, limit))
+
+    async def _load(self, key, data_type: str, constraints: List[Dict[str, Any]], environment: str, limit: Optional[int]) -> Dict[str, Any]:
+        response = await get_bubble_client().search(data_type, constraints, environment, limit=limit)
+        if response.status_code != 200:
+            raise BubbleAPIError(response.status_code, response.text)
+        page = response.json().get("response", {})
+        self._cache.set(key, page)
+        return page
+
+    def invalidate(self, data_type: str, environment: str = "version-test"):
+        """Forget every cached search of a data type in an environment"""
+        generation_key = (environment, data_type)
+        self._generations[generation_key] = self._generations.get(generation_key, 0) + 1
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "invalidations": self.invalidations,
+            "singleflight": self._singleflight.stats()
+        }
+
+# Name searches from /bubble/sample-records/search, invalidated by creates through this service
+sample_search_cache = SearchCache(
+    max_entries=settings.SAMPLE_SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SAMPLE_SEARCH_CACHE_TTL_SECONDS
+)
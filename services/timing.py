@@ -0,0 +1,117 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from contextvars import ContextVar
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+
+# Slow requests get their own logger so they can be routed or filtered separately
+slow_request_logger = logging.getLogger("slow_requests")
+
+# Upstream calls listed individually in a slow-request log line; the rest are only counted
+SLOW_LOG_MAX_CALLS = 50
+
+class UpstreamCall(NamedTuple):
+    operation: str
+    data_type: str
+    status: str
+    offset: float
+    duration: float
+
+class RequestTiming:
+    """Phase and upstream-call durations collected while one request is served"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.calls: List[UpstreamCall] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add_call(self, operation: str, data_type: str, status: str, started: float, duration: float):
+        self.calls.append(UpstreamCall(operation, data_type, status, started - self.started, duration))
+
+    def _phase_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for name, duration in self.phases:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def _call_totals(self) -> Dict[str, Tuple[int, float]]:
+        totals: Dict[str, Tuple[int, float]] = {}
+        for call in self.calls:
+            count, duration = totals.get(call.operation, (0, 0.0))
+            totals[call.operation] = (count + 1, duration + call.duration)
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing value: each phase, each Bubble operation (summed over its calls) and the total so far"""
+        entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in self._phase_totals().items()]
+        entries += [
+            f'bubble-{operation};desc="{count} call{"s" if count != 1 else ""}";dur={duration * 1000:.1f}'
+            for operation, (count, duration) in self._call_totals().items()
+        ]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def breakdown(self) -> str:
+        """Human-readable phase totals followed by every upstream call with its start offset"""
+        phases = ", ".join(f"{name}={duration:.3f}s" for name, duration in self._phase_totals().items()) or "none"
+        calls = [
+            f"{call.operation} {call.data_type} {call.status} {call.duration:.3f}s @+{call.offset:.3f}s"
+            for call in self.calls[:SLOW_LOG_MAX_CALLS]
+        ]
+        if len(self.calls) > SLOW_LOG_MAX_CALLS:
+            calls.append(f"... {len(self.calls) - SLOW_LOG_MAX_CALLS} more")
+        return f"phases: {phases}; {len(self.calls)} Bubble call(s): " + ("; ".join(calls) or "none")
+
+_request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def record_phase(name: str, duration: float):
+    """Attribute `duration` seconds to a named phase of the current request, if any"""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing.phases.append((name, duration))
+
+def record_upstream_call(operation: str, data_type: str, status: str, started: float, duration: float):
+    """Add one Bubble call (perf_counter start, duration in seconds) to the current request, if any"""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing.add_call(operation, data_type, status, started, duration)
+
+class ServerTimingMiddleware:
+    """ASGI middleware that adds a Server-Timing header and logs requests slower than the configured threshold.
+
+    The header is written when the response starts, so for streamed responses it covers
+    the work done before the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timing = RequestTiming()
+        token = _request_timing.set(timing)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                MutableHeaders(scope=message).append("Server-Timing", timing.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timing.reset(token)
+            elapsed = timing.elapsed()
+            threshold = settings.SLOW_REQUEST_THRESHOLD_SECONDS
+            if threshold > 0 and elapsed >= threshold:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                slow_request_logger.warning(
+                    f"Slow request {scope['method']} {route} took {elapsed:.3f}s - {timing.breakdown()}"
+                )
@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Tuple
+import asyncio
+import logging
+
+import httpx
+
+from config import settings
+from services.bubble_client import get_bubble_client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RecordKey = Tuple[str, str, str]
+
+class PatchCoalescer:
+    """Write-behind coalescing of PATCHes to the same Bubble record.
+
+    The first update to a record is sent right away. Updates arriving while that PATCH is in
+    flight are merged (later values win) and sent as one PATCH when it returns, and its
+    response is shared by every caller that contributed. Updates to one record are therefore
+    still applied in order, and an uncontended write waits for nothing but Bubble.
+    With `enabled` off every PATCH is sent directly.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._pending: Dict[RecordKey, Tuple[Dict[str, Any], List[asyncio.Future]]] = {}
+        self._writers: Dict[RecordKey, asyncio.Task] = {}
+        self.writes = 0
+        self.patches = 0
+
+    async def patch(
+        self,
+        data_type: str,
+        record_id: str,
+        payload: Dict[str, Any],
+        environment: str = "version-test"
+    ) -> httpx.Response:
+        """Queue a field update and return the response of the PATCH that carried it"""
+        self.writes += 1
+        if not self.enabled:
+            self.patches += 1
+            return await get_bubble_client().patch(data_type, record_id, payload, environment)
+
+        key = (environment, data_type, record_id)
+        fields, waiters = self._pending.setdefault(key, ({}, []))
+        fields.update(payload)
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        if key not in self._writers:
+            self._writers[key] = asyncio.ensure_future(self._write_behind(key))
+        return await future
+
+    async def _write_behind(self, key: RecordKey):
+        environment, data_type, record_id = key
+        try:
+            while key in self._pending:
+                fields, waiters = self._pending.pop(key)
+                if len(waiters) > 1:
+                    logger.info(f"Coalesced {len(waiters)} updates to {data_type} record {record_id} into one PATCH")
+                self.patches += 1
+                try:
+                    response = await get_bubble_client().patch(data_type, record_id, fields, environment)
+                except Exception as e:
+                    for future in waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in waiters:
+                        if not future.done():
+                            future.set_result(response)
+        finally:
+            del self._writers[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "writes": self.writes,
+            "patches": self.patches,
+            "pending_records": len(self._pending)
+        }
+
+# API Request updates from update_api_request and process-and-update
+api_request_patches = PatchCoalescer(settings.API_REQUEST_PATCH_COALESCING_ENABLED)